@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""Command-line entry point, as in “python3 -m gunka”."""
+
+# Standard:
+import sys
+
+# Local:
+from gunka.runner import main
+
+sys.exit(main())
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""Micro-benchmarks of Gunka’s own overhead.
+
+Run this module as a script to print the results, as in
+“python3 -m gunka.bench”.
+
+"""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+from typing import Callable
+from typing import Tuple
+import asyncio
+import time
+
+# Local:
+from gunka.memory import MemoryProfiler
+from gunka.sim import run as simulate
+from gunka.unit.main import Unit
+from gunka.unit.main import observed
+
+
+#############
+# INTERFACE #
+#############
+
+
+def time_children(work: Callable, n: int) -> float:
+    """Run n child units sequentially. Return mean seconds per child."""
+    child_scaffold = Unit.Scaffold(work=work)
+
+    async def parent(unit: Unit):
+        for _ in range(n):
+            await unit.new_child(child_scaffold, copy_inputs=False)()
+
+    root = Unit(Unit.Scaffold(work=parent))
+    start = time.perf_counter()
+    asyncio.run(root())
+    return (time.perf_counter() - start) / n
+
+
+def conclusion_overhead(n: int = 100000) -> Tuple[float, float]:
+    """Compare raised and returned conclusions of tiny units.
+
+    Return the mean seconds per unit for a unit that calls fail() and for
+    a unit that returns a failure marker instead.
+
+    """
+    async def raising(unit: Unit):
+        unit.fail()
+
+    async def returning(unit: Unit):
+        return unit.FAILURE
+
+    return time_children(raising, n), time_children(returning, n)
+
+
+def memory_overhead(n: int = 20000) -> Tuple[float, float]:
+    """Compare units with and without memory profiling.
+
+    Return the mean seconds per unit, for a unit that allocates a small list,
+    without profiling and with it.
+
+    """
+    async def allocating(unit: Unit):
+        unit.state.outputs.update(size=len([object() for _ in range(10)]))
+
+    plain = time_children(allocating, n)
+    with MemoryProfiler() as profiler, observed(profiler):
+        profiled = time_children(allocating, n)
+    return plain, profiled
+
+
+def concurrency_overhead(n: int = 50000, repeat: int = 3
+                         ) -> Tuple[float, float, float]:
+    """Compare asyncio.gather with run_children, for n tiny children.
+
+    Children are created without copying inputs in each case. Return the
+    best of the passed number of repetitions, as mean seconds per child, for
+    gather, for run_children with isolation and for run_children failing
+    fast.
+
+    """
+    async def nothing(unit: Unit):
+        pass
+
+    child_scaffold = Unit.Scaffold(work=nothing)
+    scaffolds = [child_scaffold] * n
+
+    async def gathered(unit: Unit):
+        await asyncio.gather(*(unit.new_child(s, copy_inputs=False)()
+                               for s in scaffolds))
+
+    async def isolated(unit: Unit):
+        await unit.run_children(scaffolds, policy=unit.FailurePolicy.ISOLATE,
+                                copy_inputs=False)
+
+    async def fast(unit: Unit):
+        await unit.run_children(scaffolds,
+                                policy=unit.FailurePolicy.FAIL_FAST,
+                                copy_inputs=False)
+
+    results = []
+    for work in (gathered, isolated, fast):
+        best = float('inf')
+        for _ in range(repeat):
+            root = Unit(Unit.Scaffold(work=work))
+            start = time.perf_counter()
+            asyncio.run(root())
+            best = min(best, time.perf_counter() - start)
+        results.append(best / n)
+    return results[0], results[1], results[2]
+
+
+def simulation(n: int = 100000, fanout: int = 100) -> Tuple[float, float]:
+    """Simulate a tree of n leaves under parents of the passed fanout.
+
+    Each leaf sleeps for between one and ten seconds of virtual time. Return
+    the real seconds per unit and the simulated duration of the whole run.
+
+    """
+    async def leaf(unit: Unit):
+        await asyncio.sleep(1 + unit.ordinal % 10)
+
+    leaf_scaffold = Unit.Scaffold(work=leaf)
+
+    async def branch(unit: Unit):
+        await unit.run_children([leaf_scaffold] * fanout,
+                                policy=unit.FailurePolicy.ISOLATE,
+                                copy_inputs=False)
+
+    branch_scaffold = Unit.Scaffold(work=branch)
+
+    async def root(unit: Unit):
+        for _ in range(n // fanout):
+            await unit.new_child(branch_scaffold, copy_inputs=False)()
+
+    summary = simulate(Unit.Scaffold(work=root))
+    state = summary.root.state
+    simulated = (state.time_stopped - state.time_started).total_seconds()
+    return summary.elapsed / summary.units, simulated
+
+
+def pipeline_overhead(n: int = 100000, length: int = 20
+                      ) -> Tuple[float, float]:
+    """Compare sequential children with a pipeline of the same length.
+
+    The root has a few inputs. Neither the sequential children nor those of
+    the pipeline copy them, so this measures only the pipeline’s own
+    handling of inputs and outputs. Return the mean seconds per child in
+    each case.
+
+    """
+    async def step(unit: Unit):
+        unit.state.outputs.update(unit.state.inputs)
+
+    scaffolds = [Unit.Scaffold(work=step)] * length
+    inputs = dict(a=list(range(10)), b='b', c=dict(d=1))
+
+    async def sequential(unit: Unit):
+        for _ in range(n // length):
+            for scaffold in scaffolds:
+                await unit.new_child(scaffold, copy_inputs=False)()
+
+    async def pipelined(unit: Unit):
+        for _ in range(n // length):
+            await unit.pipeline(scaffolds)
+
+    results = []
+    for work in (sequential, pipelined):
+        root = Unit(Unit.Scaffold(work=work))
+        root.state.inputs.update(inputs)
+        start = time.perf_counter()
+        asyncio.run(root())
+        results.append((time.perf_counter() - start) / n)
+    return results[0], results[1]
+
+
+def main():
+    """Print the results of all benchmarks."""
+    raised, returned = conclusion_overhead()
+    print(f'Conclusion by signal: {raised * 1e6:.3f} µs per unit')
+    print(f'Conclusion by marker: {returned * 1e6:.3f} µs per unit')
+    print(f'Saved by marker: {(raised - returned) * 1e6:.3f} µs per unit')
+
+    plain, profiled = memory_overhead()
+    print(f'Without memory profiling: {plain * 1e6:.3f} µs per unit')
+    print(f'With memory profiling: {profiled * 1e6:.3f} µs per unit')
+
+    gathered, isolated, fast = concurrency_overhead()
+    print(f'Children by gather: {gathered * 1e6:.3f} µs per unit')
+    print(f'Children isolated: {isolated * 1e6:.3f} µs per unit')
+    print(f'Children failing fast: {fast * 1e6:.3f} µs per unit')
+
+    sequential, pipelined = pipeline_overhead()
+    print('Sequential children without copies: '
+          f'{sequential * 1e6:.3f} µs per unit')
+    print(f'Pipelined children: {pipelined * 1e6:.3f} µs per unit')
+
+    real, simulated = simulation()
+    print(f'Simulation: {real * 1e6:.3f} µs per unit, '
+          f'{simulated:.0f} s simulated')
+
+
+if __name__ == '__main__':
+    main()
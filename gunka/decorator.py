@@ -9,6 +9,7 @@
 # Standard:
 from typing import Any
 from typing import Callable
+from typing import Mapping
 from typing import Optional
 from typing import Tuple
 from typing import Type
@@ -16,6 +17,7 @@ from uuid import UUID
 
 # Local:
 from gunka.exc import ValidationFailure
+from gunka.resource import ResourcePool
 from gunka.unit.main import Unit
 
 
@@ -28,23 +30,34 @@ def define_work_decorator(unit_type: Type[Unit],
                           always_annotate_with_id=False,
                           always_annotate_with_ui=False,
                           validators: Tuple[Callable[[Any], bool], ...] = (),
+                          application_pools: Optional[Mapping[
+                              UUID, Tuple[ResourcePool, ...]]] = None,
                           ):
     """Define a means of annotating work functions.
 
     Using validators passed to this function, the readiness of a work function
     can be assessed at time of definition, before a unit is created from it.
 
+    Resource pools can be attached to scaffolds by application UUID, through
+    a mapping passed to this function, or individually, through the
+    decorator. Units wait for all such pools before they perform their work.
+
     """
     class_id = unit_type.Identification
     class_ui = unit_type.UserInterface
 
     def work_decorator(uuid_application: Optional[UUID] = None,
                        title: Optional[str] = None,
+                       pools: Tuple[ResourcePool, ...] = (),
                        ):
         """Take metadata for a decorator of work functions."""
         annotate_with_id = always_annotate_with_id or uuid_application
         annotate_with_ui = always_annotate_with_ui or title
 
+        all_pools = tuple(pools)
+        if application_pools and uuid_application in application_pools:
+            all_pools += tuple(application_pools[uuid_application])
+
         def get_scaffold(work):
             """Get a scaffold for making units.
 
@@ -55,7 +68,7 @@ def define_work_decorator(unit_type: Type[Unit],
             Validate the scaffold.
 
             """
-            scaffold = unit_type.Scaffold(work=work)
+            scaffold = unit_type.Scaffold(work=work, pools=all_pools)
 
             if annotate_with_id:
                 scaffold.id = class_id(application=uuid_application)
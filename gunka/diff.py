@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""Comparison of two runs of a unit tree, to catch performance regressions.
+
+Runs are compared as streams of records, one per unit, in preorder. Units are
+aligned by their position in the tree and their application UUID. Because
+preorder sorts positions lexicographically, two streams can be aligned by a
+merge, in one pass, holding only a bounded number of records in memory. This
+works for trees of any size, whether live or stored as JSON lines by dump().
+
+Run this module as a script to compare two stored runs, as in
+“python3 -m gunka.diff baseline.jsonl candidate.jsonl”.
+
+"""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import TextIO
+from typing import Tuple
+from uuid import UUID
+import argparse
+import heapq
+import json
+import math
+
+# Local:
+from gunka.unit.base import BaseUnit
+import gunka.pred as pred
+import gunka.util as util
+
+
+#############
+# INTERFACE #
+#############
+
+
+@dataclass(frozen=True)
+class Record():
+    """Figures on one unit of a run, for comparison."""
+
+    position: Tuple[int, ...]
+    application: Optional[UUID] = field(default=None)
+    work: Optional[str] = field(default=None)
+    seconds: Optional[float] = field(default=None)
+    acceptable: bool = field(default=False)
+
+
+@dataclass(frozen=True)
+class Thresholds():
+    """Criteria for a slowdown to count as a regression.
+
+    A slowdown must exceed both a ratio of the baseline and an absolute
+    number of seconds. Where a work function has more than one unit in each
+    run, the difference in mean duration must also be statistically
+    significant, by Welch’s t statistic.
+
+    """
+
+    ratio: float = field(default=0.1)
+    seconds: float = field(default=0.001)
+    t: float = field(default=3.0)
+    top: int = field(default=20)  # Number of regressions to report.
+
+
+@dataclass(frozen=True)
+class UnitRegression():
+    """A slowdown of one unit."""
+
+    position: Tuple[int, ...]
+    work: Optional[str]
+    baseline: float
+    candidate: float
+
+    @property
+    def delta(self) -> float:
+        """Get the slowdown in seconds."""
+        return self.candidate - self.baseline
+
+
+@dataclass(frozen=True)
+class WorkRegression():
+    """A slowdown of all units of one work function, on average."""
+
+    work: Optional[str]
+    count: int          # Number of units in the candidate.
+    baseline: float     # Mean seconds.
+    candidate: float    # Mean seconds.
+    t: float            # Welch’s t statistic, or infinity if unavailable.
+
+    @property
+    def delta(self) -> float:
+        """Get the total slowdown in seconds, across the candidate’s units."""
+        return (self.candidate - self.baseline) * self.count
+
+
+@dataclass()
+class Report():
+    """The result of a comparison, with the worst regressions first."""
+
+    matched: int = field(default=0)
+    added: int = field(default=0)
+    removed: int = field(default=0)
+    new_failures: int = field(default=0)
+    failures: List[Record] = field(default_factory=list)  # First few.
+    units: List[UnitRegression] = field(default_factory=list)
+    work: List[WorkRegression] = field(default_factory=list)
+
+    def __str__(self):
+        """Describe the comparison in a few lines of text."""
+        lines = [f'Matched: {self.matched}, added: {self.added}, '
+                 f'removed: {self.removed}',
+                 f'New failures: {self.new_failures}']
+        for record in self.failures:
+            lines.append(f'  {_where(record.position)} {record.work}')
+        lines.append(f'Regressed work functions: {len(self.work)}')
+        for r in self.work:
+            lines.append(f'  {r.work}: {r.baseline:.6f} s → '
+                         f'{r.candidate:.6f} s mean, n={r.count}, '
+                         f'+{r.delta:.6f} s total')
+        lines.append(f'Worst regressed units: {len(self.units)}')
+        for r in self.units:
+            lines.append(f'  {_where(r.position)} {r.work}: '
+                         f'{r.baseline:.6f} s → {r.candidate:.6f} s')
+        return '\n'.join(lines)
+
+
+def records(unit: BaseUnit) -> Iterator[Record]:
+    """Generate records of the passed unit and its family, in preorder."""
+    stack: List[Tuple[BaseUnit, Tuple[int, ...]]] = [(unit, ())]
+    while stack:
+        u, position = stack.pop()
+        yield Record(position=position,
+                     application=getattr(getattr(u, 'id', None),
+                                         'application', None),
+                     work=util.work_name(u) if u._work else None,
+                     seconds=_seconds(u),
+                     acceptable=pred.acceptable(u))
+        for i in range(len(u.children) - 1, -1, -1):
+            child = u.children[i]
+            stack.append((child, position + (getattr(child, 'ordinal', i),)))
+
+
+def dump(stream: Iterable[Record], file: TextIO):
+    """Store a stream of records as JSON lines."""
+    for record in stream:
+        application = record.application
+        file.write(json.dumps(dict(
+            position=record.position,
+            application=None if application is None else str(application),
+            work=record.work,
+            seconds=record.seconds,
+            acceptable=record.acceptable)))
+        file.write('\n')
+
+
+def load(file: TextIO) -> Iterator[Record]:
+    """Generate records from JSON lines, as stored by dump()."""
+    for line in file:
+        data = json.loads(line)
+        application = data['application']
+        yield Record(
+            position=tuple(data['position']),
+            application=None if application is None else UUID(application),
+            work=data['work'],
+            seconds=data['seconds'],
+            acceptable=data['acceptable'])
+
+
+def compare(baseline: Iterable[Record],
+            candidate: Iterable[Record],
+            thresholds: Thresholds = Thresholds(),
+            ) -> Report:
+    """Compare two runs, each a stream of records in preorder."""
+    report = Report()
+    worst: List[Tuple[float, int, UnitRegression]] = []
+    stats: Dict[Optional[str], Tuple[_Moments, _Moments]] = dict()
+
+    for old, new in _align(baseline, candidate):
+        if new is None:
+            report.removed += 1
+            continue
+        if old is None:
+            report.added += 1
+            continue
+        report.matched += 1
+
+        if old.acceptable and not new.acceptable:
+            report.new_failures += 1
+            if len(report.failures) < thresholds.top:
+                report.failures.append(new)
+
+        if old.seconds is None or new.seconds is None:
+            continue
+
+        pair = stats.get(new.work)
+        if pair is None:
+            pair = stats[new.work] = (_Moments(), _Moments())
+        pair[0].add(old.seconds)
+        pair[1].add(new.seconds)
+
+        if _slower(old.seconds, new.seconds, thresholds):
+            regression = UnitRegression(new.position, new.work,
+                                        old.seconds, new.seconds)
+            item = (regression.delta, -report.matched, regression)
+            if len(worst) < thresholds.top:
+                heapq.heappush(worst, item)
+            elif item[:2] > worst[0][:2]:
+                heapq.heapreplace(worst, item)
+
+    report.units = [r for _, _, r in sorted(worst, reverse=True)]
+
+    for work, (old, new) in stats.items():
+        if not _slower(old.mean, new.mean, thresholds):
+            continue
+        t = _welch(old, new)
+        if t >= thresholds.t:
+            report.work.append(WorkRegression(work, new.n, old.mean,
+                                              new.mean, t))
+    report.work.sort(key=lambda r: r.delta, reverse=True)
+    del report.work[thresholds.top:]
+
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Compare two stored runs. Return 1 if anything regressed, else 0."""
+    parser = argparse.ArgumentParser(
+        prog='python3 -m gunka.diff',
+        description='Compare two runs stored as JSON lines.')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--ratio', type=float, default=Thresholds.ratio)
+    parser.add_argument('--seconds', type=float, default=Thresholds.seconds)
+    parser.add_argument('--t', type=float, default=Thresholds.t)
+    parser.add_argument('--top', type=int, default=Thresholds.top)
+    args = parser.parse_args(argv)
+
+    thresholds = Thresholds(ratio=args.ratio, seconds=args.seconds,
+                            t=args.t, top=args.top)
+    with open(args.baseline) as old, open(args.candidate) as new:
+        report = compare(load(old), load(new), thresholds)
+    print(report)
+    return 1 if report.new_failures or report.units or report.work else 0
+
+
+############
+# INTERNAL #
+############
+
+
+class _Moments():
+    """Running mean and variance, by Welford’s method."""
+
+    __slots__ = ('n', 'mean', 'm2')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x: float):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+
+def _align(baseline: Iterable[Record], candidate: Iterable[Record]
+           ) -> Iterator[Tuple[Optional[Record], Optional[Record]]]:
+    """Merge two streams in preorder into pairs of matching records."""
+    old_iter, new_iter = iter(baseline), iter(candidate)
+    old, new = next(old_iter, None), next(new_iter, None)
+    last_old = last_new = None
+
+    while old is not None or new is not None:
+        for record, last in ((old, last_old), (new, last_new)):
+            if record is not None and last is not None:
+                if record.position <= last:
+                    raise ValueError('Records not in preorder at '
+                                     f'{_where(record.position)}.')
+
+        if new is None or (old is not None and old.position < new.position):
+            yield old, None
+            last_old, old = old.position, next(old_iter, None)
+        elif old is None or new.position < old.position:
+            yield None, new
+            last_new, new = new.position, next(new_iter, None)
+        else:
+            if old.application == new.application:
+                yield old, new
+            else:
+                yield old, None
+                yield None, new
+            last_old, old = old.position, next(old_iter, None)
+            last_new, new = new.position, next(new_iter, None)
+
+
+def _seconds(unit: BaseUnit) -> Optional[float]:
+    started, stopped = unit.state.time_started, unit.state.time_stopped
+    if started is None or stopped is None:
+        return None
+    return (stopped - started).total_seconds()
+
+
+def _slower(old: float, new: float, thresholds: Thresholds) -> bool:
+    return (new - old > thresholds.seconds and
+            new > old * (1 + thresholds.ratio))
+
+
+def _welch(old: _Moments, new: _Moments) -> float:
+    """Compute Welch’s t statistic, or infinity without enough data."""
+    if old.n < 2 or new.n < 2:
+        return math.inf
+    error = math.sqrt(old.variance / old.n + new.variance / new.n)
+    if error == 0:
+        return math.inf
+    return (new.mean - old.mean) / error
+
+
+def _where(position: Tuple[int, ...]) -> str:
+    return '/' + '/'.join(map(str, position))
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""Attribution of memory allocation to units of work.
+
+A profiler observes units as they start and stop, reading the current and
+peak traced memory from the standard tracemalloc module at each such event.
+The figures are stored in the state of each unit, as an Allocation.
+
+Tracemalloc traces the whole process. Where units run concurrently, each is
+charged for what was allocated during its lifetime, including allocations by
+its concurrent peers. Figures are exact only for units that run alone.
+
+Overhead: tracemalloc slows down all allocation in the process, including
+Gunka’s own, and stores a traceback for each traced block, which costs more
+memory with more frames. The profiler adds work at each start and stop in
+proportion to the number of units running at the time. In the benchmark of
+tiny, sequential units in gunka.bench, profiling has been measured to add
+50 to 90 µs per unit, making such units five to ten times slower, depending
+on the machine and Python version. Units that do substantial work without
+allocating much are slowed down far less. Run python3 -m gunka.bench for
+figures on a given machine.
+
+"""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Dict
+import threading
+import tracemalloc
+
+# Local:
+from gunka.unit.base import BaseUnit
+from gunka.unit.main import Observer
+from gunka.unit.main import Unit
+import gunka.util as util
+
+
+#############
+# INTERFACE #
+#############
+
+
+@dataclass()
+class Usage():
+    """Memory allocated by all units of one work function, in bytes."""
+
+    count: int = field(default=0)
+    self_net: int = field(default=0)  # Sum over units.
+    peak: int = field(default=0)      # Maximum over units.
+    self_peak: int = field(default=0)  # Maximum over units.
+
+
+class MemoryProfiler(Observer):
+    """An observer of units that attributes memory allocation to them.
+
+    Use an instance as a context manager, together with gunka.unit.main’s
+    observed() function. If tracemalloc is not already tracing, the profiler
+    starts it on entry and stops it on exit.
+
+    """
+
+    def __init__(self, frames: int = 1):
+        """Initialize. Trace the passed number of frames per allocation."""
+        self.frames = frames
+        self._started_tracing = False
+        self._lock = threading.Lock()
+        self._open: Dict[Unit, _Record] = dict()
+
+    def __enter__(self):
+        """Start tracing memory if needed."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, *_):
+        """Stop tracing memory if it was started on entry."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def started(self, unit: Unit):
+        """Note the baseline of the passed unit."""
+        with self._lock:
+            current = self._observe()
+            self._open[unit] = _Record(current)
+            parent = self._open.get(unit.parent)
+            if parent is not None:
+                parent.open_children += 1
+
+    def stopped(self, unit: Unit):
+        """Attribute allocation to the passed unit."""
+        with self._lock:
+            current = self._observe()
+            record = self._open.pop(unit, None)
+            if record is None:
+                return  # Started before profiling.
+
+            net = current - record.baseline
+            unit.state.memory = BaseUnit.Allocation(
+                net=net,
+                peak=record.peak - record.baseline,
+                self_net=net - record.children_net,
+                self_peak=record.self_peak - record.baseline)
+
+            parent = self._open.get(unit.parent)
+            if parent is not None:
+                parent.open_children -= 1
+                parent.children_net += net
+
+    ############
+    # INTERNAL #
+    ############
+
+    def _observe(self) -> int:
+        """Charge the peak since the last event to all running units.
+
+        Return the current size of traced memory.
+
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for record in self._open.values():
+            if peak > record.peak:
+                record.peak = peak
+            if not record.open_children:
+                # Memory still held by stopped children is theirs.
+                own = peak - record.children_net
+                if own > record.self_peak:
+                    record.self_peak = own
+        return current
+
+
+def rollup(unit: BaseUnit) -> Dict[str, Usage]:
+    """Sum up the memory allocation of a tree of units by work function.
+
+    Work functions are identified by module and qualified name. Units without
+    figures are skipped.
+
+    """
+    usage: Dict[str, Usage] = dict()
+    for u in util.preorder(unit):
+        allocation = u.state.memory
+        if allocation is None:
+            continue
+        total = usage.setdefault(util.work_name(u), Usage())
+        total.count += 1
+        total.self_net += allocation.self_net
+        total.peak = max(total.peak, allocation.peak)
+        total.self_peak = max(total.self_peak, allocation.self_peak)
+    return usage
+
+
+############
+# INTERNAL #
+############
+
+
+class _Record():
+    """Running figures on a unit that has started but not stopped."""
+
+    __slots__ = ('baseline', 'peak', 'self_peak', 'open_children',
+                 'children_net')
+
+    def __init__(self, baseline: int):
+        self.baseline = baseline
+        self.peak = baseline
+        self.self_peak = baseline
+        self.open_children = 0
+        self.children_net = 0
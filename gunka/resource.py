@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""Named pools of a limited resource, shared across a tree of units.
+
+A pool limits the number of units that may use some resource at the same
+time, such as a database that tolerates a certain number of callers, wherever
+those units are in the tree. Units wait for a pool in order of arrival.
+
+A pool may be shared between event loops in different threads, as under
+gunka.shard.
+
+"""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+from collections import deque
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Deque
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+import asyncio
+import threading
+
+
+#############
+# INTERFACE #
+#############
+
+
+@dataclass()
+class PoolMetrics():
+    """Statistics on the use of a pool. Times are in seconds of loop time."""
+
+    acquisitions: int = field(default=0)
+    waits: int = field(default=0)          # Acquisitions that were queued.
+    total_wait: float = field(default=0.0)
+    max_wait: float = field(default=0.0)
+    peak_queue: int = field(default=0)
+
+    @property
+    def mean_wait(self) -> float:
+        """Get the mean wait per acquisition."""
+        return self.total_wait / self.acquisitions if self.acquisitions else 0
+
+
+class ResourcePool():
+    """A first-come, first-served limit on concurrent use of a resource."""
+
+    def __init__(self, name: str, capacity: int):
+        """Initialize."""
+        assert capacity > 0
+        self.name = name
+        self.capacity = capacity
+        self.metrics = PoolMetrics()
+        self._available = capacity
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """Represent the pool for debugging."""
+        return f'{type(self).__name__}({self.name!r}, {self.capacity})'
+
+    @property
+    def in_use(self) -> int:
+        """Get the number of units currently holding the resource."""
+        return self.capacity - self._available
+
+    async def acquire(self):
+        """Wait for a share of the resource."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        with self._lock:
+            if self._available and not self._waiters:
+                self._available -= 1
+                self.metrics.acquisitions += 1
+                return
+            waiter = _Waiter(loop, loop.create_future())
+            self._waiters.append(waiter)
+            self.metrics.peak_queue = max(self.metrics.peak_queue,
+                                          len(self._waiters))
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self._release()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+
+        wait = loop.time() - start
+        with self._lock:
+            self.metrics.acquisitions += 1
+            self.metrics.waits += 1
+            self.metrics.total_wait += wait
+            self.metrics.max_wait = max(self.metrics.max_wait, wait)
+
+    def release(self):
+        """Return a share of the resource, passing it to the next waiter."""
+        with self._lock:
+            self._release()
+
+    ############
+    # INTERNAL #
+    ############
+
+    def _release(self):
+        """Release with the lock already held.
+
+        Hand the share directly to the first waiter whose loop is still open.
+        If there is none, return it to the pool.
+
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+            if waiter.loop is _running_loop():
+                _grant(waiter.future)
+                return
+            try:
+                waiter.loop.call_soon_threadsafe(_grant, waiter.future)
+                return
+            except RuntimeError:
+                # The waiter’s loop is closed. Pass the share on.
+                continue
+
+        assert self._available < self.capacity
+        self._available += 1
+
+
+async def acquire_all(pools: Iterable[ResourcePool]
+                      ) -> Tuple[ResourcePool, ...]:
+    """Acquire each of the passed pools. Return them in order of acquisition.
+
+    Pools are acquired in a consistent order, by name, to prevent deadlock
+    between units that need more than one pool. If interrupted, release those
+    already acquired.
+
+    """
+    acquired = []
+    try:
+        for pool in sorted(pools, key=lambda p: (p.name, id(p))):
+            await pool.acquire()
+            acquired.append(pool)
+    except BaseException:
+        release_all(acquired)
+        raise
+    return tuple(acquired)
+
+
+def release_all(pools: Iterable[ResourcePool]):
+    """Release each of the passed pools, in reverse order."""
+    for pool in reversed(tuple(pools)):
+        pool.release()
+
+
+############
+# INTERNAL #
+############
+
+
+class _Waiter():
+    """A unit waiting in the queue of a pool."""
+
+    __slots__ = ('loop', 'future', 'granted')
+
+    def __init__(self, loop: asyncio.AbstractEventLoop,
+                 future: asyncio.Future):
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+
+def _grant(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
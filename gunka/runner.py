@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""A top-level runner for root units, with a command-line interface."""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Type
+import argparse
+import asyncio
+import importlib
+import time
+
+# Local:
+from gunka.unit.main import Meter
+from gunka.unit.main import Unit
+from gunka.unit.main import metered
+import gunka.util as util
+
+
+#############
+# INTERFACE #
+#############
+
+
+@dataclass()
+class Summary():
+    """A summary of a run of a root unit.
+
+    The number of units is that of the finished tree. The number performed
+    can be higher, where tracing is sampled, or lower, where units were
+    never performed.
+
+    The overhead is the mean time, in seconds, that each unit performed in
+    the run spent in the framework rather than in its work function. Refer
+    to gunka.unit.main.Meter for what this includes. It is None if no units
+    were performed.
+
+    """
+
+    root: Unit
+    units: int = field(default=0)
+    performed: int = field(default=0)
+    elapsed: float = field(default=0.0)
+    overhead: Optional[float] = field(default=None)
+    eager: bool = field(default=False)
+
+    def __str__(self):
+        """Describe the run in a few lines of text."""
+        lines = [f'Outcome: {"acceptable" if self.root else "unacceptable"}',
+                 f'Units: {self.units}',
+                 f'Elapsed: {self.elapsed:.6f} s',
+                 f'Eager tasks: {"yes" if self.eager else "no"}']
+        if self.overhead is not None:
+            lines.append(f'Overhead: {self.overhead * 1e6:.3f} µs per unit, '
+                         f'{self.overhead * self.performed:.6f} s in total')
+        return '\n'.join(lines)
+
+
+def get_loop_factory(obj: Any) -> Callable[[], asyncio.AbstractEventLoop]:
+    """Interpret the passed object as a source of new event loops.
+
+    Accept an event loop policy, an event loop policy class, or a callable
+    that returns a new event loop, such as an event loop class.
+
+    """
+    if isinstance(obj, type) and issubclass(obj,
+                                            asyncio.AbstractEventLoopPolicy):
+        obj = obj()
+    if isinstance(obj, asyncio.AbstractEventLoopPolicy):
+        return obj.new_event_loop
+    if callable(obj):
+        return obj
+    raise TypeError(f'Not a source of event loops: {obj!r}.')
+
+
+def run(scaffold,
+        cls: Type[Unit] = Unit,
+        inputs: Optional[Dict[str, Any]] = None,
+        loop_factory: Optional[Callable[[], asyncio.AbstractEventLoop]] = None,
+        eager: bool = False,
+        ) -> Summary:
+    """Run a new root unit from the passed scaffold. Return a summary.
+
+    With eager set, tasks are created by asyncio.eager_task_factory, so that
+    child units that finish without suspending are never scheduled on the
+    event loop at all.
+
+    The overhead of each unit in the run is metered, which itself costs a
+    few timestamps per unit.
+
+    Exceptions propagating from the root unit are not caught.
+
+    """
+    if eager and not hasattr(asyncio, 'eager_task_factory'):
+        raise RuntimeError('Eager task execution requires Python 3.12+.')
+
+    root = cls(scaffold)
+    if inputs is not None:
+        root.state.inputs.update(inputs)
+
+    summary = Summary(root=root, eager=eager)
+    meter = Meter()
+
+    with metered(meter), asyncio.Runner(loop_factory=loop_factory) as runner:
+        if eager:
+            runner.get_loop().set_task_factory(asyncio.eager_task_factory)
+
+        start = time.perf_counter()
+        try:
+            runner.run(root())
+        finally:
+            summary.elapsed = time.perf_counter() - start
+            summary.units = sum(1 for _ in util.preorder(root))
+            summary.performed = meter.units
+            if meter.units:
+                summary.overhead = meter.seconds / meter.units
+
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run a root unit from the command line. Return an exit status."""
+    parser = argparse.ArgumentParser(
+        prog='gunka',
+        description='Run a root unit of work and summarize the run.')
+    parser.add_argument('work', metavar='MODULE:NAME',
+                        help='a scaffold or work function to run as the root')
+    parser.add_argument('--loop', metavar='MODULE:NAME',
+                        help=('an event loop policy or event loop factory, '
+                              'such as uvloop:EventLoopPolicy'))
+    parser.add_argument('--eager', action='store_true',
+                        help='use eager task execution (Python 3.12+)')
+    args = parser.parse_args(argv)
+
+    work = _resolve(args.work)
+    if not isinstance(work, Unit.Scaffold):
+        work = Unit.Scaffold(work=work)
+
+    loop_factory = None
+    if args.loop:
+        loop_factory = get_loop_factory(_resolve(args.loop))
+
+    summary = run(work, loop_factory=loop_factory, eager=args.eager)
+    print(summary)
+    return 0 if summary.root else 1
+
+
+############
+# INTERNAL #
+############
+
+
+def _resolve(spec: str) -> Any:
+    """Import an object from a specification like “package.module:name”."""
+    module_name, _, name = spec.partition(':')
+    obj = importlib.import_module(module_name)
+    for part in filter(None, name.split('.')):
+        obj = getattr(obj, part)
+    return obj
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""Sampled tracing, for trees too large to record in full.
+
+Under a sampling policy, a child joins its parent’s children only when it
+concludes, and only if it is to be kept. A unit is kept if it is not clean or
+if it is part of a deterministic sample. A clean unit is one that is
+acceptable, along with all of its recorded descendants. Units that are not
+kept are folded into tallies in the parent’s state, by application UUID.
+Units that failed, were cancelled or were in error are always kept, along
+with their ancestors. Children are kept in order of creation.
+
+While a child is running, it is not among its parent’s children. A unit that
+is created but never performed is not recorded at all.
+
+Tallies count every unit that was not kept and sum its duration exactly, so
+totals and means are unbiased. Where individual sampled units are used to
+estimate a distribution, weigh each by the inverse of its sampling rate.
+
+Sampling saves memory, and the time it takes to traverse, store or export a
+tree afterwards. It does not make units cheaper to run. Every unit still gets
+a full state, a copy of its inputs and its timestamps while it runs.
+
+"""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+from bisect import insort
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Dict
+from typing import Optional
+from uuid import UUID
+import hashlib
+import struct
+
+# Local:
+from gunka.unit.base import BaseUnit
+import gunka.pred as pred
+import gunka.util as util
+
+
+#############
+# INTERFACE #
+#############
+
+
+@dataclass()
+class Sampling():
+    """A policy for sampling clean units.
+
+    The rate is a fraction of clean units to keep. Rates by application UUID
+    take precedence. The salt varies the selection between otherwise
+    identical runs.
+
+    """
+
+    rate: float = field(default=1.0)
+    rates: Dict[Optional[UUID], float] = field(default_factory=dict)
+    salt: int = field(default=0)
+
+    def rate_for(self, unit: BaseUnit) -> float:
+        """Get the sampling rate applicable to the passed unit."""
+        return self.rates.get(_application(unit), self.rate)
+
+    def keep(self, unit: BaseUnit) -> bool:
+        """Decide whether to keep the passed clean unit in full.
+
+        The decision depends only on the rate, the salt, the unit’s
+        application UUID and its position in the tree, so it is repeatable,
+        also from one process to another.
+
+        """
+        rate = self.rate_for(unit)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+
+        application = _application(unit)
+        position = util.position(unit)
+        data = b''.join((struct.pack('>q', self.salt),
+                         b'' if application is None else application.bytes,
+                         struct.pack(f'>{len(position)}q', *position)))
+        key = hashlib.blake2b(data, digest_size=8).digest()
+        return int.from_bytes(key, 'big') / 2 ** 64 < rate
+
+    def weight(self, unit: BaseUnit) -> float:
+        """Weigh a kept unit for estimates of distributions.
+
+        Clean units stand in for those removed from the sample. Other units
+        stand only for themselves.
+
+        """
+        if getattr(unit, '_clean', False):
+            rate = self.rate_for(unit)
+            if 0 < rate < 1:
+                return 1 / rate
+        return 1.0
+
+
+def conclude(unit: BaseUnit, sampling: Sampling):
+    """Apply a sampling policy to a unit that has just concluded.
+
+    Note whether the unit is clean. If it is clean but not sampled, fold it
+    into its parent’s tallies. Otherwise, add it to its parent’s children,
+    in order of creation.
+
+    """
+    clean = pred.acceptable(unit) and all(getattr(c, '_clean', False)
+                                          for c in unit.children)
+    unit._clean = clean
+
+    parent = unit.parent
+    if parent is None:
+        return
+
+    if clean and not sampling.keep(unit):
+        if parent.state.elided is None:
+            parent.state.elided = dict()
+        _fold(unit, parent.state.elided)
+    else:
+        insort(parent.children, unit, key=_ordinal)
+
+
+def tally(unit: BaseUnit) -> Dict[Optional[UUID], BaseUnit.Tally]:
+    """Total up the passed unit and its family, by application UUID.
+
+    Count both recorded units and those folded into tallies.
+
+    """
+    tallies: Dict[Optional[UUID], BaseUnit.Tally] = dict()
+    _fold(unit, tallies)
+    return tallies
+
+
+############
+# INTERNAL #
+############
+
+
+def _ordinal(unit: BaseUnit) -> int:
+    return unit.ordinal
+
+
+def _application(unit: BaseUnit) -> Optional[UUID]:
+    return getattr(getattr(unit, 'id', None), 'application', None)
+
+
+def _add(tallies, application, count, seconds, squares):
+    old = tallies.get(application)
+    if old is not None:
+        count += old.count
+        seconds += old.seconds
+        squares += old.squares
+    tallies[application] = BaseUnit.Tally(count=count, seconds=seconds,
+                                          squares=squares)
+
+
+def _fold(unit: BaseUnit, tallies: Dict[Optional[UUID], BaseUnit.Tally]):
+    """Add the passed unit, its tallies and its descendants to tallies."""
+    seconds = 0.0
+    if unit.state.time_started and unit.state.time_stopped:
+        seconds = (unit.state.time_stopped -
+                   unit.state.time_started).total_seconds()
+    _add(tallies, _application(unit), 1, seconds, seconds ** 2)
+
+    for application, other in (unit.state.elided or {}).items():
+        _add(tallies, application, other.count, other.seconds, other.squares)
+
+    for child in unit.children:
+        _fold(child, tallies)
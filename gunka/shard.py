@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""Sharded execution of independent subtrees on a pool of event loops.
+
+A single event loop runs on a single thread. Where a workload is bound to the
+loop itself, as by the overhead of callbacks, independent subtrees can instead
+be run on a pool of loops, each in a thread of its own. This pays off most on
+free-threaded builds of Python, where the threads can run in parallel.
+
+While a unit runs on a pool, it and its descendants belong to the thread of
+that loop. The parent regains the unit when its call on the pool returns.
+Anything that touches the parent on the unit’s conclusion, such as adding
+the unit to its parent’s children under a sampling policy, is instead done
+on the parent’s own loop, before the call returns.
+
+"""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+from itertools import cycle
+from typing import List
+from typing import Optional
+import asyncio
+import contextvars
+import os
+import threading
+
+# Local:
+from gunka.unit.main import Unit
+from gunka.unit.main import _detached
+import gunka.sampling as sampling
+
+
+#############
+# INTERFACE #
+#############
+
+
+class LoopPool():
+    """A pool of event loops, each running in a thread of its own.
+
+    Use an instance as a context manager, or call start() and close().
+
+    """
+
+    def __init__(self, size: Optional[int] = None):
+        """Initialize. Default to one loop per processor."""
+        self.size = size or os.cpu_count() or 1
+        self._loops: List[asyncio.AbstractEventLoop] = list()
+        self._threads: List[threading.Thread] = list()
+        self._cycle = None
+
+    def __enter__(self):
+        """Start the pool."""
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        """Close the pool."""
+        self.close()
+
+    def start(self):
+        """Start one thread and event loop for each slot in the pool."""
+        assert not self._loops
+        for i in range(self.size):
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=self._serve, args=(loop,),
+                                      name=f'gunka-shard-{i}', daemon=True)
+            thread.start()
+            self._loops.append(loop)
+            self._threads.append(thread)
+        self._cycle = cycle(self._loops)
+
+    def close(self):
+        """Stop all loops and wait for their threads to finish.
+
+        Units should not still be running on the pool at this point.
+
+        """
+        for loop in self._loops:
+            loop.call_soon_threadsafe(loop.stop)
+        for thread in self._threads:
+            thread.join()
+        self._loops.clear()
+        self._threads.clear()
+        self._cycle = None
+
+    async def call(self, unit: Unit) -> Unit:
+        """Perform the work of the passed unit on a loop in the pool.
+
+        Await the result as if the unit had been called on the current loop.
+        The unit runs in a copy of the current context. Exceptions, including
+        conclusion signals, are raised here as they were raised there.
+
+        If the caller is cancelled, the cancellation is passed on to the unit
+        and the caller waits for it to take effect, so that the unit has
+        noted it before the caller resumes. The caller is cancelled even if
+        the unit finished before the cancellation reached it.
+
+        """
+        if self._cycle is None:
+            raise RuntimeError('Loop pool not started.')
+
+        home = asyncio.get_running_loop()
+        away = next(self._cycle)
+        outcome = home.create_future()
+        context = contextvars.copy_context()
+        context.run(_detached.set, unit)
+        remote = []
+
+        def settle(task: asyncio.Task):
+            # On the home loop, which owns the parent.
+            if (unit.tracing is not None and
+                    unit.state.time_stopped is not None):
+                sampling.conclude(unit, unit.tracing)
+            if outcome.done():
+                return
+            if task.cancelled():
+                outcome.cancel()
+            elif task.exception() is not None:
+                outcome.set_exception(task.exception())
+            else:
+                outcome.set_result(task.result())
+
+        def report(task: asyncio.Task):
+            # On the away loop.
+            home.call_soon_threadsafe(settle, task)
+
+        def start():
+            # On the away loop.
+            task = away.create_task(unit(), context=context)
+            task.add_done_callback(report)
+            remote.append(task)
+
+        def cancel():
+            # On the away loop, always after start.
+            remote[0].cancel()
+
+        away.call_soon_threadsafe(start)
+        cancelled = False
+        while True:
+            try:
+                result = await asyncio.shield(outcome)
+            except asyncio.CancelledError:
+                if outcome.done():
+                    raise
+                cancelled = True
+                away.call_soon_threadsafe(cancel)
+            else:
+                if cancelled:
+                    # The unit finished before the cancellation reached it.
+                    raise asyncio.CancelledError()
+                return result
+
+    ############
+    # INTERNAL #
+    ############
+
+    @staticmethod
+    def _serve(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
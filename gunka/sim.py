@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Simulation of unit trees in virtual time.
+
+Under a virtual-time event loop, time passes only when the loop would
+otherwise wait. Whenever nothing is ready to run, the loop’s clock jumps
+straight to the next scheduled timer. Sleeps and timeouts therefore complete
+instantly in real time, while their order and their simulated durations are
+preserved. Unit timestamps follow the same clock when run through run().
+
+This is intended for load testing, capacity planning and benchmarking of
+scheduling behaviour on large trees with realistic delays. Simulated work
+should wait only on the loop’s own timers. Real I/O and threads still work,
+but the clock will not wait for them while timers are pending.
+
+"""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+from typing import Optional
+import asyncio
+import datetime
+import selectors
+
+# Local:
+from gunka.runner import Summary
+from gunka.unit.main import clocked
+from gunka.unit.main import get_current_time
+import gunka.runner as runner
+
+
+#############
+# INTERFACE #
+#############
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """An event loop with a virtual clock."""
+
+    def __init__(self, start: Optional[datetime.datetime] = None):
+        """Initialize. Start the clock at the passed date and time, or now."""
+        self._virtual = 0.0
+        self.epoch = get_current_time() if start is None else start
+        super().__init__(_Selector(self))
+
+    def time(self) -> float:
+        """Get the virtual time of the loop, in seconds since its start."""
+        return self._virtual
+
+    def now(self) -> datetime.datetime:
+        """Get the virtual date and time."""
+        return self.epoch + datetime.timedelta(seconds=self._virtual)
+
+    def advance(self, seconds: float):
+        """Move the clock forward."""
+        assert seconds >= 0
+        self._virtual += seconds
+
+
+def run(scaffold, start: Optional[datetime.datetime] = None, **kwargs
+        ) -> Summary:
+    """Run a new root unit in virtual time, as with gunka.runner.run.
+
+    Unit timestamps are taken from the virtual clock. The elapsed time in the
+    summary is real.
+
+    """
+    loop = VirtualTimeLoop(start)
+    with clocked(loop.now):
+        return runner.run(scaffold, loop_factory=lambda: loop, **kwargs)
+
+
+############
+# INTERNAL #
+############
+
+
+class _Selector(selectors.DefaultSelector):
+    """A selector that advances virtual time instead of waiting for it."""
+
+    def __init__(self, loop: VirtualTimeLoop):
+        super().__init__()
+        self._loop = loop
+
+    def select(self, timeout: Optional[float] = None):
+        events = super().select(0)
+        if events or timeout == 0:
+            return events
+        if timeout is None:
+            # Nothing is scheduled. Wait for I/O or another thread.
+            return super().select(None)
+        self._loop.advance(timeout)
+        return []
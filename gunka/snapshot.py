@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""Immutable, structurally shared snapshots of unit trees.
+
+A snapshot is taken on the thread of the event loop that runs the tree, in
+one synchronous step, so that it cannot observe a unit halfway through a
+change. The result is immutable and can be handed to other threads.
+
+Each new snapshot reuses those parts of a previous snapshot that were settled,
+meaning stopped with all their descendants also stopped. A settled subtree is
+not expected to change, so it is not revisited. Nor are the settled children
+at the start of each list of children, up to the first child that was still
+running when the previous snapshot was taken. The cost of a snapshot is thus
+roughly proportional to the part of the tree that follows such a child, not
+to the size of the whole tree.
+
+Changes made to a unit after its subtree has settled, as when a parent edits
+the outputs of a completed child, are not seen by snapshots that reuse it.
+
+"""
+
+###########
+# IMPORTS #
+###########
+
+
+# Future:
+from __future__ import annotations
+
+# Standard:
+from concurrent.futures import Future
+from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import fields
+from dataclasses import is_dataclass
+from dataclasses import make_dataclass
+from types import MappingProxyType
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+import asyncio
+
+# Local:
+from gunka.unit.base import BaseUnit
+
+
+#############
+# INTERFACE #
+#############
+
+
+@dataclass(frozen=True)
+class Snapshot():
+    """An immutable view of a unit and its family.
+
+    The state, id and ui of a snapshot are frozen copies of the unit’s
+    dataclasses. Within them, at any depth, dictionaries are copied as
+    read-only mappings, lists and tuples as tuples, sets as frozen sets and
+    mutable dataclasses as frozen dataclasses. Other objects, such as the
+    instances of custom classes, are shared with the unit, not copied; treat
+    them as immutable. Snapshots work with the predicates of gunka.pred and
+    the traversal of gunka.util.
+
+    The version is that of the snapshot of the tree in which this node was
+    last rebuilt. Nodes reused from a previous snapshot keep their version.
+    The ordinal is that of the unit among its siblings or, for units without
+    ordinals, its index among them.
+
+    """
+
+    state: Any
+    children: Tuple[Snapshot, ...]
+    id: Any = field(default=None)
+    ui: Any = field(default=None)
+    work: Optional[Callable] = field(default=None)
+    version: int = field(default=1)
+    settled: bool = field(default=False)
+    ordinal: int = field(default=0)
+
+    # The number of leading children that are settled.
+    _prefix: int = field(default=0, repr=False, compare=False)
+
+
+def take(unit: BaseUnit, previous: Optional[Snapshot] = None) -> Snapshot:
+    """Take a snapshot of the passed unit and its family.
+
+    Call this function on the thread of the event loop that runs the unit,
+    as from a work function or a loop callback. If a previous snapshot of the
+    same unit is passed, share its settled parts. Children are matched to
+    their previous snapshots by ordinal.
+
+    """
+    version = 1 if previous is None else previous.version + 1
+    return _take(unit, previous, version, getattr(unit, 'ordinal', 0))
+
+
+def take_threadsafe(unit: BaseUnit,
+                    loop: asyncio.AbstractEventLoop,
+                    previous: Optional[Snapshot] = None,
+                    timeout: Optional[float] = None,
+                    ) -> Snapshot:
+    """Take a snapshot from a thread other than that of the passed loop.
+
+    Schedule the snapshot on the loop and block until it has been taken.
+    Do not call this on the loop’s own thread; that would deadlock.
+
+    """
+    future: Future = Future()
+
+    def callback():
+        try:
+            future.set_result(take(unit, previous))
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    loop.call_soon_threadsafe(callback)
+    return future.result(timeout)
+
+
+############
+# INTERNAL #
+############
+
+
+# Frozen counterparts to mutable dataclasses and their field names, by class.
+_FROZEN: Dict[type, Tuple[type, Tuple[str, ...]]] = dict()
+
+
+def _take(unit: BaseUnit, previous: Optional[Snapshot], version: int,
+          ordinal: int = 0) -> Snapshot:
+    if previous is not None and previous.settled:
+        return previous
+
+    current = unit.children
+    start = 0
+    if previous is None:
+        children = tuple(_take(c, None, version, _ordinal(c, i))
+                         for i, c in enumerate(current))
+    else:
+        old = previous.children
+        start = previous._prefix
+        if start and (len(current) < start or
+                      _ordinal(current[start - 1], start - 1) !=
+                      old[start - 1].ordinal):
+            # Children were inserted before the end of the settled prefix.
+            start = 0
+        children = old[:start] + tuple(_align(current, old, start, version))
+
+    prefix = start
+    while prefix < len(children) and children[prefix].settled:
+        prefix += 1
+
+    settled = (unit.state.time_stopped is not None and
+               prefix == len(children))
+
+    return Snapshot(state=_freeze(unit.state),
+                    children=children,
+                    id=_freeze(getattr(unit, 'id', None)),
+                    ui=_freeze(getattr(unit, 'ui', None)),
+                    work=unit._work,
+                    version=version,
+                    settled=settled,
+                    ordinal=ordinal,
+                    _prefix=prefix)
+
+
+def _align(current: List[BaseUnit], old: Tuple[Snapshot, ...], start: int,
+           version: int) -> Iterator[Snapshot]:
+    """Snapshot children from start, matching previous snapshots by ordinal.
+
+    Both sequences are in order of creation, so a single merge suffices.
+
+    """
+    i = start
+    for index in range(start, len(current)):
+        child = current[index]
+        ordinal = _ordinal(child, index)
+        while i < len(old) and old[i].ordinal < ordinal:
+            i += 1
+        match = None
+        if i < len(old) and old[i].ordinal == ordinal:
+            match = old[i]
+        yield _take(child, match, version, ordinal)
+
+
+def _ordinal(unit: BaseUnit, index: int) -> int:
+    """Get the ordinal of a unit, falling back to its index as a child.
+
+    Plain base units, which have no ordinals, are never inserted out of order.
+
+    """
+    return getattr(unit, 'ordinal', index)
+
+
+def _freeze(obj: Any) -> Any:
+    """Make a frozen copy of a value, as described for Snapshot."""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    if isinstance(obj, (set, frozenset)):
+        return frozenset(_freeze(v) for v in obj)
+    if (not is_dataclass(obj) or isinstance(obj, type) or
+            obj.__dataclass_params__.frozen):
+        return obj
+
+    cls = type(obj)
+    try:
+        frozen, names = _FROZEN[cls]
+    except KeyError:
+        frozen = make_dataclass(cls.__name__,
+                                [(f.name, f.type) for f in fields(cls)],
+                                frozen=True)
+        names = tuple(f.name for f in fields(cls))
+        _FROZEN[cls] = frozen, names
+
+    return frozen(**{name: _freeze(getattr(obj, name)) for name in names})
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""Detection of stalls in an event loop, blamed on the unit at fault.
+
+A work function that blocks, as by synchronous I/O or heavy computation,
+stalls every unit on the same event loop. A stall detector measures the lag of
+a heartbeat on the loop. A watchdog thread notices when the heartbeat is
+overdue and, while the loop is still blocked, identifies the unit currently
+performing work, optionally with a sample of the blocking stack.
+
+When the loop resumes, the stall is recorded on the unit and added to the
+detector’s metrics, by work function.
+
+The overhead is one loop callback per interval and one thread that wakes up
+once per interval.
+
+"""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+# Local:
+from gunka.unit.base import BaseUnit
+from gunka.unit.main import Unit
+from gunka.unit.main import current_unit
+import gunka.util as util
+
+
+#############
+# INTERFACE #
+#############
+
+
+@dataclass()
+class StallMetrics():
+    """Aggregate figures on stalls, in seconds.
+
+    Tallies are keyed by the name of the work function blamed, or None where
+    no unit could be blamed.
+
+    """
+
+    count: int = field(default=0)
+    seconds: float = field(default=0.0)
+    max_seconds: float = field(default=0.0)
+    by_work: Dict[Optional[str], BaseUnit.Tally] = field(default_factory=dict)
+
+
+class StallDetector():
+    """A detector of stalls in one event loop.
+
+    Use an instance as an asynchronous context manager in the loop to be
+    watched, as in a root unit’s work function, or call start() and stop()
+    from the thread of the loop.
+
+    A stall is an interval over the threshold, in seconds, during which the
+    loop did not run its callbacks. The loop is checked at the passed
+    interval, which defaults to a quarter of the threshold.
+
+    """
+
+    def __init__(self,
+                 threshold: float = 0.1,
+                 interval: Optional[float] = None,
+                 stack: bool = False,
+                 ):
+        """Initialize."""
+        self.threshold = threshold
+        self.interval = threshold / 4 if interval is None else interval
+        self.stack = stack
+        self.metrics = StallMetrics()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._expected = 0.0
+        self._suspect: Optional[Tuple[Optional[Unit], Optional[Tuple]]] = None
+
+    async def __aenter__(self):
+        """Start watching the running loop."""
+        self.start(asyncio.get_running_loop())
+        return self
+
+    async def __aexit__(self, *_):
+        """Stop watching."""
+        self.stop()
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Start watching the passed loop, from its own thread."""
+        assert self._loop is None
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._stopping.clear()
+        self._schedule(time.monotonic())
+        self._watchdog = threading.Thread(target=self._watch,
+                                          name='gunka-stall', daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        """Stop watching."""
+        self._stopping.set()
+        self._watchdog.join()
+        self._handle.cancel()
+        self._loop = None
+
+    ############
+    # INTERNAL #
+    ############
+
+    def _schedule(self, now: float):
+        with self._lock:
+            self._expected = now + self.interval
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _beat(self):
+        """Measure the lag of the heartbeat, on the loop."""
+        now = time.monotonic()
+        with self._lock:
+            lag = now - self._expected
+            suspect, self._suspect = self._suspect, None
+
+        if lag > self.threshold:
+            unit, stack = suspect or (None, None)
+            self._record(unit, lag, stack)
+
+        self._schedule(now)
+
+    def _watch(self):
+        """Look for an overdue heartbeat, on the watchdog thread."""
+        while not self._stopping.wait(self.interval):
+            with self._lock:
+                overdue = time.monotonic() - self._expected > self.threshold
+                if overdue and self._suspect is None:
+                    self._suspect = self._blame()
+
+    def _blame(self) -> Tuple[Optional[Unit], Optional[Tuple[str, ...]]]:
+        """Identify the unit blocking the loop, from the watchdog thread."""
+        frame = sys._current_frames().get(self._loop_thread)
+
+        unit = None
+        task = asyncio.current_task(self._loop)
+        if task is not None and hasattr(task, 'get_context'):
+            unit = current_unit(task.get_context())  # Python 3.12+.
+        if unit is None:
+            unit = _innermost_unit(frame)
+
+        stack = None
+        if self.stack and frame is not None:
+            stack = tuple(traceback.format_stack(frame))
+
+        return unit, stack
+
+    def _record(self, unit: Optional[Unit], seconds: float,
+                stack: Optional[Tuple[str, ...]]):
+        """Record a stall on the unit and in the metrics, on the loop."""
+        work = None
+        if unit is not None:
+            if unit.state.stalls is None:
+                unit.state.stalls = list()
+            unit.state.stalls.append(BaseUnit.Stall(seconds=seconds,
+                                                    stack=stack))
+            work = util.work_name(unit)
+
+        metrics = self.metrics
+        metrics.count += 1
+        metrics.seconds += seconds
+        metrics.max_seconds = max(metrics.max_seconds, seconds)
+        old = metrics.by_work.get(work, BaseUnit.Tally())
+        metrics.by_work[work] = BaseUnit.Tally(
+            count=old.count + 1,
+            seconds=old.seconds + seconds,
+            squares=old.squares + seconds ** 2)
+
+
+############
+# INTERNAL #
+############
+
+
+def _innermost_unit(frame) -> Optional[Unit]:
+    """Find the unit whose __call__ is nearest the top of a stack."""
+    while frame is not None:
+        if frame.f_code is Unit.__call__.__code__:
+            return frame.f_locals.get('self')
+        frame = frame.f_back
+    return None
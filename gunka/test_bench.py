@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the bench module, using pytest."""
+
+###########
+# IMPORTS #
+###########
+
+
+# Local:
+from gunka.bench import conclusion_overhead
+from gunka.bench import concurrency_overhead
+from gunka.bench import memory_overhead
+from gunka.bench import pipeline_overhead
+from gunka.bench import simulation
+
+
+#########
+# TESTS #
+#########
+
+
+def test_conclusion_overhead():
+    """Check that the benchmark of conclusions runs."""
+    raised, returned = conclusion_overhead(n=10)
+    assert raised > 0
+    assert returned > 0
+
+
+def test_memory_overhead():
+    """Check that the benchmark of memory profiling runs."""
+    plain, profiled = memory_overhead(n=10)
+    assert plain > 0
+    assert profiled > 0
+
+
+def test_concurrency_overhead():
+    """Check that the benchmark of concurrent children runs."""
+    assert all(t > 0 for t in concurrency_overhead(n=10, repeat=1))
+
+
+def test_simulation():
+    """Check that the benchmark of simulation runs."""
+    real, simulated = simulation(n=20, fanout=10)
+    assert real > 0
+    assert simulated == 20
+
+
+def test_pipeline_overhead():
+    """Check that the benchmark of pipelines runs."""
+    sequential, pipelined = pipeline_overhead(n=20, length=5)
+    assert sequential > 0
+    assert pipelined > 0
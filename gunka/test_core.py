@@ -14,7 +14,10 @@ import pytest
 
 # Local:
 from gunka.decorator import permissive
+from gunka.resource import ResourcePool
+from gunka.unit.main import Meter
 from gunka.unit.main import Unit
+from gunka.unit.main import metered
 
 
 #########
@@ -275,3 +278,332 @@ def test_concurrency_with_failure():
     assert not root.children[1].state.error
 
     assert root.children[2]
+
+
+def test_children_fail_fast():
+    """Check that a failing child cancels its siblings under FAIL_FAST.
+
+    The slow sibling should be cancelled while asleep, and the sibling that
+    had not yet started should be marked as cancelled all the same. The
+    parent is not cancelled and continues thereafter.
+
+    """
+    @permissive()
+    async def a(unit: Unit):
+        await asyncio.sleep(1)
+
+    @permissive()
+    async def b(unit: Unit):
+        unit.fail()
+
+    @permissive()
+    async def c(unit: Unit):
+        await unit.run_children((a, b, a),
+                                policy=unit.FailurePolicy.FAIL_FAST)
+        unit.state.outputs.update(after=True)
+
+    root = Unit(c)
+    asyncio.run(root())
+
+    assert not root
+    assert root.state.outputs == dict(after=True)
+    assert not root.state.cancelled
+
+    a0, b0, a1 = root.children
+    assert a0.state.cancelled
+    assert a0.state.time_started is not None
+    assert not b0.state.cancelled
+    assert b0.state.failure
+    assert a1.state.cancelled
+
+
+def test_children_isolate():
+    """Check that a failing child does not affect its siblings."""
+    @permissive()
+    async def a(unit: Unit):
+        await asyncio.sleep(0.01)
+
+    @permissive()
+    async def b(unit: Unit):
+        unit.fail()
+
+    @permissive()
+    async def c(unit: Unit):
+        await unit.run_children((a, b, a), policy=unit.FailurePolicy.ISOLATE)
+
+    root = Unit(c)
+    asyncio.run(root())
+
+    a0, b0, a1 = root.children
+    assert a0
+    assert not b0
+    assert a1
+
+
+def test_children_quorum():
+    """Check that pending siblings are cancelled once a quorum is reached."""
+    @permissive()
+    async def a(unit: Unit):
+        pass
+
+    @permissive()
+    async def b(unit: Unit):
+        await asyncio.sleep(1)
+
+    @permissive()
+    async def c(unit: Unit):
+        await unit.run_children((a, b, a), policy=unit.FailurePolicy.QUORUM,
+                                quorum=2)
+
+    root = Unit(c)
+    asyncio.run(root())
+
+    a0, b0, a1 = root.children
+    assert a0
+    assert b0.state.cancelled
+    assert a1
+
+
+def test_children_quorum_invalid():
+    """Check that an impossible quorum is rejected."""
+    @permissive()
+    async def a(unit: Unit):
+        pass
+
+    @permissive()
+    async def b(unit: Unit):
+        await unit.run_children((a,), policy=unit.FailurePolicy.QUORUM,
+                                quorum=2)
+
+    root = Unit(b)
+    with pytest.raises(ValueError):
+        asyncio.run(root())
+    assert root.children == []
+
+
+def test_children_quorum_zero():
+    """Check that a quorum of zero is rejected."""
+    @permissive()
+    async def a(unit: Unit):
+        pass
+
+    @permissive()
+    async def b(unit: Unit):
+        await unit.run_children((a,), policy=unit.FailurePolicy.QUORUM,
+                                quorum=0)
+
+    with pytest.raises(ValueError):
+        asyncio.run(Unit(b)())
+
+
+def test_children_several_errors():
+    """Check that simultaneous errors of siblings are all kept."""
+    @permissive()
+    async def a(unit: Unit):
+        unit.panic()
+
+    @permissive()
+    async def b(unit: Unit):
+        1 / 0
+
+    @permissive()
+    async def c(unit: Unit):
+        await unit.run_children((a, b), policy=unit.FailurePolicy.ISOLATE)
+
+    root = Unit(c)
+
+    with pytest.raises(root.ConclusionSignal) as info:
+        asyncio.run(root())
+
+    others = info.value.__cause__.exceptions
+    assert len(others) == 1
+    assert isinstance(others[0], ZeroDivisionError)
+
+
+def test_children_panic():
+    """Check that panic() propagates through run_children unwrapped."""
+    @permissive()
+    async def a(unit: Unit):
+        await asyncio.sleep(1)
+
+    @permissive()
+    async def b(unit: Unit):
+        unit.panic()
+
+    @permissive()
+    async def c(unit: Unit):
+        await unit.run_children((a, b), policy=unit.FailurePolicy.ISOLATE)
+        unit.state.outputs.update(after=True)
+
+    root = Unit(c)
+
+    with pytest.raises(root.ConclusionSignal):
+        asyncio.run(root())
+
+    assert root.state.outputs == dict()
+    assert not root.state.error
+
+    a0, b0 = root.children
+    assert a0.state.cancelled
+    assert b0.state.error
+
+
+def test_parent_of_returned_failure():
+    """Check that a returned failure marker works like fail()."""
+    @permissive()
+    async def a(unit: Unit):
+        unit.state.outputs.update(before=True)
+        return unit.FAILURE
+
+    @permissive()
+    async def b(unit: Unit):
+        await unit.new_child(a)()
+        unit.state.outputs.update(after=True)
+
+    root = Unit(b)
+    asyncio.run(root())
+
+    assert not root
+    assert root.state.outputs == dict(after=True)
+    assert not root.state.failure
+
+    assert root.children[0].state.failure
+    assert not root.children[0].state.error
+
+
+def test_parent_of_returned_success():
+    """Check that a returned success marker works like succeed()."""
+    @permissive()
+    async def a(unit: Unit):
+        return unit.SUCCESS
+
+    @permissive()
+    async def b(unit: Unit):
+        await unit.new_child(a)()
+
+    root = Unit(b)
+    asyncio.run(root())
+
+    assert root
+    assert root.children[0]
+
+
+def test_parent_of_returned_panic():
+    """Check that a returned panic marker propagates like panic()."""
+    @permissive()
+    async def a(unit: Unit):
+        return unit.PANIC
+
+    @permissive()
+    async def b(unit: Unit):
+        unit.state.outputs.update(before=True)
+        await unit.new_child(a)()
+        unit.state.outputs.update(after=True)
+
+    root = Unit(b)
+
+    with pytest.raises(root.ConclusionSignal):
+        asyncio.run(root())
+
+    assert not root
+    assert root.state.outputs == dict(before=True)
+    assert not root.state.error
+
+    assert root.children[0].state.error
+
+
+def test_pipeline():
+    """Check that a pipeline passes outputs on as inputs, without copying."""
+    @permissive()
+    async def a(unit: Unit):
+        unit.state.outputs.update(n=unit.state.inputs['n'] + 1)
+
+    @permissive()
+    async def b(unit: Unit):
+        children = await unit.pipeline((a, a, a))
+        unit.state.outputs.update(children[-1].state.outputs)
+
+    root = Unit(b)
+    root.state.inputs.update(n=0)
+    asyncio.run(root())
+
+    assert root
+    assert root.state.outputs == dict(n=3)
+
+    a0, a1, a2 = root.children
+    assert a0.state.inputs is root.state.inputs
+    assert a1.state.inputs is a0.state.outputs
+    assert a2.state.inputs is a1.state.outputs
+    assert a0.state.time_stopped <= a1.state.time_started
+    assert [c.ordinal for c in root.children] == [0, 1, 2]
+
+
+def test_pipeline_failure():
+    """Check that a pipeline stops at the first failure."""
+    @permissive()
+    async def a(unit: Unit):
+        pass
+
+    @permissive()
+    async def b(unit: Unit):
+        unit.fail()
+
+    @permissive()
+    async def c(unit: Unit):
+        children = await unit.pipeline((a, b, a))
+        unit.state.outputs.update(ran=len(children))
+
+    root = Unit(c)
+    asyncio.run(root())
+
+    assert not root
+    assert root.state.outputs == dict(ran=2)
+    assert len(root.children) == 2
+    assert root.children[1].state.failure
+
+
+def test_pipeline_panic():
+    """Check that panic() propagates out of a pipeline."""
+    @permissive()
+    async def a(unit: Unit):
+        pass
+
+    @permissive()
+    async def b(unit: Unit):
+        unit.panic()
+
+    @permissive()
+    async def c(unit: Unit):
+        await unit.pipeline((a, b, a))
+        unit.state.outputs.update(after=True)
+
+    root = Unit(c)
+
+    with pytest.raises(root.ConclusionSignal):
+        asyncio.run(root())
+
+    assert root.state.outputs == dict()
+    assert len(root.children) == 2
+    assert root.children[1].state.error
+
+
+def test_metered():
+    """Check that overhead excludes work and waiting for resource pools."""
+    pool = ResourcePool('pool', 1)
+
+    @permissive()
+    async def a(unit: Unit):
+        await asyncio.sleep(0.05)
+
+    scaffold = Unit.Scaffold(work=a.work, pools=(pool,))
+
+    @permissive()
+    async def b(unit: Unit):
+        await unit.run_children([scaffold] * 2,
+                                policy=unit.FailurePolicy.ISOLATE)
+
+    with metered(Meter()) as meter:
+        asyncio.run(Unit(b)())
+
+    assert meter.units == 3
+    assert 0 < meter.seconds < 0.05
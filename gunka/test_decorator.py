@@ -6,6 +6,9 @@
 ###########
 
 
+# Standard:
+from uuid import uuid4
+
 # Third party:
 import pytest
 
@@ -14,6 +17,7 @@ from gunka.decorator import define_work_decorator
 from gunka.unit.main import Unit
 from gunka.pred import require_title
 from gunka.exc import ValidationFailure
+from gunka.resource import ResourcePool
 
 
 #########
@@ -41,3 +45,23 @@ def test_title_required_included():
 
     assert tcita.ui is not None
     assert tcita.ui.title == 'lo tcita ku'
+
+
+def test_application_pools():
+    """Check that pools are attached to scaffolds by application UUID."""
+    application = uuid4()
+    shared = ResourcePool('shared', 1)
+    own = ResourcePool('own', 1)
+    note = define_work_decorator(Unit,
+                                 application_pools={application: (shared,)})
+
+    @note(uuid_application=application, pools=(own,))
+    async def a(unit: Unit):
+        pass
+
+    @note()
+    async def b(unit: Unit):
+        pass
+
+    assert a.pools == (own, shared)
+    assert b.pools == ()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the diff module, using pytest."""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+import asyncio
+import io
+import uuid
+
+# Third party:
+import pytest
+
+# Local:
+from gunka.decorator import permissive
+from gunka.diff import Record
+from gunka.diff import Thresholds
+from gunka.diff import compare
+from gunka.diff import dump
+from gunka.diff import load
+from gunka.diff import records
+from gunka.unit.main import Unit
+
+
+#########
+# TESTS #
+#########
+
+
+APPLICATION = uuid.uuid4()
+
+
+def run(leaf_seconds):
+    """Describe a run where a root has leaves of the passed durations."""
+    total = sum(s for s in leaf_seconds if s is not None)
+    yield Record((), work='root', seconds=total, acceptable=True)
+    for i, seconds in enumerate(leaf_seconds):
+        yield Record((i,), application=APPLICATION, work='leaf',
+                     seconds=seconds, acceptable=seconds is not None)
+
+
+def test_records():
+    """Check records of a live tree, stored and loaded."""
+    @permissive(uuid_application=APPLICATION)
+    async def a(unit: Unit):
+        pass
+
+    @permissive()
+    async def b(unit: Unit):
+        await unit.new_child(a)()
+        await unit.new_child(b if unit.parent is None else a)()
+
+    root = Unit(b)
+    asyncio.run(root())
+
+    stream = list(records(root))
+    assert [r.position for r in stream] == [(), (0,), (1,), (1, 0), (1, 1)]
+    assert stream[1].application == APPLICATION
+    assert stream[1].work.endswith('test_records.<locals>.a')
+    assert all(r.acceptable for r in stream)
+
+    file = io.StringIO()
+    dump(stream, file)
+    file.seek(0)
+    assert list(load(file)) == stream
+
+
+def test_compare_unchanged():
+    """Check that identical runs show no regression."""
+    report = compare(run([0.1] * 10), run([0.1] * 10))
+    assert report.matched == 11
+    assert not report.units
+    assert not report.work
+    assert not report.new_failures
+
+
+def test_compare_regressions():
+    """Check regressions of a unit and of a work function."""
+    old = [0.1, 0.11, 0.09] * 10
+    new = [0.2, 0.21, 0.19] * 10 + [0.1]
+    report = compare(run(old), run(new), Thresholds(top=5))
+
+    assert report.matched == 31
+    assert report.added == 1
+    assert len(report.units) == 5
+    assert report.units[0].position == ()  # Worst first.
+    assert report.units[0].delta == pytest.approx(3.1)
+
+    work = {r.work: r for r in report.work}
+    assert work['leaf'].count == 30
+    assert work['leaf'].delta == pytest.approx(3.0)
+    assert work['root'].t == float('inf')  # Only one unit each.
+
+
+def test_compare_noise():
+    """Check that a difference within the noise is not a regression."""
+    old = [0.1, 0.3] * 10
+    new = [0.3, 0.1] * 10
+    new[0] = 0.31
+    report = compare(run(old), run(new), Thresholds(ratio=0.01))
+    assert 'leaf' not in {r.work for r in report.work}
+
+
+def test_compare_failures():
+    """Check that new failures are reported."""
+    report = compare(run([0.1, 0.1]), run([0.1, None]))
+    assert report.new_failures == 1
+    assert report.failures[0].position == (1,)
+    assert 'New failures: 1' in str(report)
+
+
+def test_compare_unordered():
+    """Check that records out of preorder are refused."""
+    with pytest.raises(ValueError):
+        compare(reversed(list(run([0.1, 0.1]))), run([0.1, 0.1]))
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the memory module, using pytest."""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+import asyncio
+
+# Local:
+from gunka.decorator import permissive
+from gunka.memory import MemoryProfiler
+from gunka.memory import rollup
+from gunka.unit.main import Unit
+from gunka.unit.main import observed
+
+
+#########
+# TESTS #
+#########
+
+
+SIZE = 1_000_000
+
+
+def test_memory_attribution():
+    """Check self and inclusive figures for a parent and its children."""
+    kept = []
+
+    @permissive()
+    async def keeper(unit: Unit):
+        kept.append(bytearray(SIZE))
+
+    @permissive()
+    async def spiker(unit: Unit):
+        spike = bytearray(SIZE)
+        del spike
+
+    @permissive()
+    async def parent(unit: Unit):
+        await unit.new_child(keeper)()
+        await unit.new_child(spiker)()
+        kept.append(bytearray(2 * SIZE))
+
+    root = Unit(parent)
+    with MemoryProfiler() as profiler, observed(profiler):
+        asyncio.run(root())
+
+    keeper_unit, spiker_unit = root.children
+    assert keeper_unit.state.memory.net >= SIZE
+    assert keeper_unit.state.memory.self_net == keeper_unit.state.memory.net
+    assert abs(spiker_unit.state.memory.net) < SIZE / 10
+    assert spiker_unit.state.memory.peak >= SIZE
+
+    memory = root.state.memory
+    assert memory.net >= 3 * SIZE
+    assert 2 * SIZE <= memory.self_net < 3 * SIZE
+    assert memory.peak >= 3 * SIZE
+    assert 2 * SIZE <= memory.self_peak < 3 * SIZE
+
+    usage = rollup(root)
+    assert len(usage) == 3
+    key = f'{__name__}.test_memory_attribution.<locals>.keeper'
+    assert usage[key].count == 1
+    assert usage[key].self_net >= SIZE
+
+
+def test_memory_off():
+    """Check that units are not burdened without a profiler."""
+    @permissive()
+    async def a(unit: Unit):
+        pass
+
+    root = Unit(a)
+    asyncio.run(root())
+    assert root.state.memory is None
+    assert rollup(root) == dict()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the resource module, using pytest."""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+import asyncio
+
+# Local:
+from gunka.decorator import permissive
+from gunka.resource import ResourcePool
+from gunka.resource import _Waiter
+from gunka.unit.main import Unit
+
+
+#########
+# TESTS #
+#########
+
+
+def test_pool_limit():
+    """Check that a pool limits concurrency anywhere in a tree."""
+    pool = ResourcePool('db', 2)
+    peak = []
+    order = []
+
+    @permissive(pools=(pool,))
+    async def a(unit: Unit):
+        order.append(unit.state.inputs['n'])
+        peak.append(pool.in_use)
+        await asyncio.sleep(0.01)
+
+    @permissive()
+    async def b(unit: Unit):
+        await unit.run_children((a, a), policy=unit.FailurePolicy.ISOLATE,
+                                new_inputs=dict(n=unit.state.inputs['n']))
+
+    @permissive()
+    async def c(unit: Unit):
+        await asyncio.gather(*(unit.new_child(b, new_inputs=dict(n=n))()
+                               for n in range(3)))
+
+    root = Unit(c)
+    asyncio.run(root())
+
+    assert root
+    assert max(peak) == 2
+    assert order == [0, 0, 1, 1, 2, 2]  # First come, first served.
+    assert pool.in_use == 0
+    assert pool.metrics.acquisitions == 6
+    assert pool.metrics.waits == 4
+    assert pool.metrics.max_wait > 0
+    assert pool.metrics.peak_queue == 4
+
+
+def test_pool_cancellation():
+    """Check that a unit cancelled in the queue gives up its place."""
+    pool = ResourcePool('api', 1)
+
+    @permissive(pools=(pool,))
+    async def a(unit: Unit):
+        await asyncio.sleep(0.01)
+
+    @permissive()
+    async def b(unit: Unit):
+        first = asyncio.ensure_future(unit.new_child(a)())
+        second = asyncio.ensure_future(unit.new_child(a)())
+        await asyncio.sleep(0)
+        second.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        await unit.new_child(a)()
+
+    root = Unit(b)
+    asyncio.run(root())
+
+    first, second, third = root.children
+    assert first
+    assert second.state.cancelled
+    assert second.state.time_started is None
+    assert third
+    assert pool.in_use == 0
+
+
+def test_pool_closed_loop():
+    """Check that a share meant for a closed loop is passed on."""
+    pool = ResourcePool('api', 1)
+    closed = asyncio.new_event_loop()
+    orphan = closed.create_future()
+    closed.close()
+
+    async def work():
+        await pool.acquire()
+        pool._waiters.append(_Waiter(closed, orphan))  # Waiting elsewhere.
+        waiting = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        pool.release()
+        await asyncio.wait_for(waiting, 1)
+        pool.release()
+
+    asyncio.run(work())
+    assert pool.in_use == 0
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the runner module, using pytest."""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+import asyncio
+
+# Third party:
+import pytest
+
+# Local:
+from gunka.decorator import permissive
+from gunka.runner import get_loop_factory
+from gunka.runner import main
+from gunka.runner import run
+from gunka.unit.main import Unit
+
+
+##################
+# WORK FUNCTIONS #
+##################
+
+
+@permissive()
+async def leaf(unit: Unit):
+    pass
+
+
+@permissive()
+async def branch(unit: Unit):
+    await unit.run_children((leaf, leaf), policy=unit.FailurePolicy.ISOLATE)
+
+
+@permissive()
+async def failure(unit: Unit):
+    unit.fail()
+
+
+#########
+# TESTS #
+#########
+
+
+def test_run_summary():
+    """Check that a run is summarized."""
+    summary = run(branch, inputs=dict(a=1))
+
+    assert summary.root
+    assert summary.root.state.inputs == dict(a=1)
+    assert summary.units == 3
+    assert summary.performed == 3
+    assert summary.elapsed > 0
+    assert 0 < summary.overhead * 3 < summary.elapsed
+    assert 'Units: 3' in str(summary)
+    assert 'Overhead: ' in str(summary)
+
+
+def test_run_loop_policy():
+    """Check that an event loop policy is accepted as a loop factory."""
+    factory = get_loop_factory(asyncio.DefaultEventLoopPolicy)
+    assert run(leaf, loop_factory=factory).root
+
+
+@pytest.mark.skipif(not hasattr(asyncio, 'eager_task_factory'),
+                    reason='requires eager task execution')
+def test_run_eager():
+    """Check a run with eager task execution."""
+    summary = run(branch, eager=True)
+    assert summary.root
+    assert summary.eager
+
+
+@pytest.mark.skipif(hasattr(asyncio, 'eager_task_factory'),
+                    reason='eager task execution is available')
+def test_run_eager_unavailable():
+    """Check that eager task execution is refused where unavailable."""
+    with pytest.raises(RuntimeError):
+        run(branch, eager=True)
+
+
+def test_main(capsys):
+    """Check the exit status of the command-line interface."""
+    assert main([f'{__name__}:branch']) == 0
+    assert 'Outcome: acceptable' in capsys.readouterr().out
+    assert main([f'{__name__}:failure']) == 1
+    assert 'Outcome: unacceptable' in capsys.readouterr().out
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the sampling module, using pytest."""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+import asyncio
+import os
+import subprocess
+import sys
+import uuid
+
+# Local:
+from gunka.sampling import Sampling
+from gunka.sampling import tally
+from gunka.unit.main import Unit
+import gunka
+import gunka.util as util
+
+
+#########
+# TESTS #
+#########
+
+
+APPLICATION = uuid.uuid4()
+
+
+def make_tree(sampling: Sampling, n: int = 200):
+    """Run a root with n leaves, of which every tenth fails."""
+    class Sampled(Unit):
+        tracing = sampling
+
+    async def leaf(unit):
+        if unit.state.inputs['i'] % 10 == 0:
+            unit.fail()
+
+    leaf_scaffold = Sampled.Scaffold(
+        work=leaf, id=Sampled.Identification(application=APPLICATION))
+
+    async def root_work(unit):
+        for i in range(n):
+            await unit.new_child(leaf_scaffold, new_inputs=dict(i=i))()
+
+    root = Sampled(Sampled.Scaffold(work=root_work))
+    asyncio.run(root())
+    return root
+
+
+def test_sampling_none():
+    """Check that a zero rate keeps only units that did not succeed."""
+    root = make_tree(Sampling(rate=0))
+
+    assert len(root.children) == 20
+    assert all(c.state.failure for c in root.children)
+    assert [c.ordinal for c in root.children] == list(range(0, 200, 10))
+    assert root.state.elided[APPLICATION].count == 180
+
+
+def test_sampling_rates():
+    """Check sampling by application, with exact totals."""
+    root = make_tree(Sampling(rate=0, rates={APPLICATION: 0.5}))
+
+    kept = [c for c in root.children if not c.state.failure]
+    assert 50 < len(kept) < 130
+    assert root.state.elided[APPLICATION].count == 180 - len(kept)
+
+    totals = tally(root)
+    assert totals[APPLICATION].count == 200
+    assert totals[None].count == 1
+
+    weights = sum(root.tracing.weight(c) for c in kept)
+    assert weights == 2 * len(kept)
+
+
+def test_sampling_deterministic():
+    """Check that the sample is the same from one run to the next."""
+    sampling = Sampling(rate=0.3)
+    first = make_tree(sampling)
+    second = make_tree(sampling)
+
+    assert ([util.position(c) for c in first.children] ==
+            [util.position(c) for c in second.children])
+
+
+def test_sampling_deterministic_across_processes():
+    """Check that the sample does not vary with the process.
+
+    Units without an application UUID are the sensitive case, because the
+    built-in hash of None is not the same from one process to the next.
+
+    """
+    code = '\n'.join((
+        'import asyncio',
+        'from gunka.sampling import Sampling',
+        'from gunka.unit.main import Unit',
+        'class Sampled(Unit):',
+        '    tracing = Sampling(rate=0.3)',
+        'async def leaf(unit):',
+        '    pass',
+        'async def work(unit):',
+        '    for _ in range(100):',
+        '        await unit.new_child(Sampled.Scaffold(work=leaf))()',
+        'root = Sampled(Sampled.Scaffold(work=work))',
+        'asyncio.run(root())',
+        'print([c.ordinal for c in root.children])',
+    ))
+    root = os.path.dirname(os.path.dirname(gunka.__file__))
+    samples = set()
+    for seed in ('1', '2', '3'):
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        result = subprocess.run([sys.executable, '-c', code], env=env,
+                                cwd=root, capture_output=True, text=True,
+                                check=True)
+        samples.add(result.stdout.strip())
+    assert len(samples) == 1
+    assert samples.pop() not in ('[]', str(list(range(100))))
+
+
+def test_sampling_order_of_creation():
+    """Check that kept children are in order of creation.
+
+    Children concluding in reverse order are not among their parent’s
+    children until they conclude.
+
+    """
+    class Sampled(Unit):
+        tracing = Sampling(rate=1)
+
+    running = []
+
+    async def leaf(unit):
+        running.append(len(unit.parent.children))
+        await asyncio.sleep(0.01 * (5 - unit.ordinal))
+
+    async def root_work(unit):
+        await unit.run_children([Sampled.Scaffold(work=leaf)] * 5,
+                                policy=Unit.FailurePolicy.ISOLATE)
+
+    root = Sampled(Sampled.Scaffold(work=root_work))
+    asyncio.run(root())
+
+    assert running == [0] * 5
+    assert [c.ordinal for c in root.children] == list(range(5))
+
+
+def test_sampling_keeps_ancestors_of_failure():
+    """Check that an otherwise clean parent of a failure is kept."""
+    class Sampled(Unit):
+        tracing = Sampling(rate=0)
+
+    async def leaf(unit):
+        unit.fail()
+
+    async def branch(unit):
+        await unit.new_child(Sampled.Scaffold(work=leaf))()
+
+    async def root_work(unit):
+        await unit.new_child(Sampled.Scaffold(work=branch))()
+
+    root = Sampled(Sampled.Scaffold(work=root_work))
+    asyncio.run(root())
+
+    assert len(root.children) == 1
+    assert len(root.children[0].children) == 1
+    assert root.state.elided is None
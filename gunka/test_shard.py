@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the shard module, using pytest."""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+import asyncio
+import threading
+import time
+
+# Third party:
+import pytest
+
+# Local:
+from gunka.decorator import permissive
+from gunka.sampling import Sampling
+from gunka.shard import LoopPool
+from gunka.unit.main import Unit
+
+
+#########
+# TESTS #
+#########
+
+
+@pytest.fixture()
+def pool():
+    """Provide a running pool of two event loops."""
+    with LoopPool(2) as p:
+        yield p
+
+
+def test_shard_threads(pool):
+    """Check that sharded children run on other threads."""
+    @permissive()
+    async def a(unit: Unit):
+        await asyncio.sleep(0.01)
+        unit.state.outputs.update(thread=threading.get_ident())
+
+    @permissive()
+    async def b(unit: Unit):
+        await asyncio.gather(pool.call(unit.new_child(a)),
+                             pool.call(unit.new_child(a)))
+
+    root = Unit(b)
+    asyncio.run(root())
+
+    assert root
+    threads = {c.state.outputs['thread'] for c in root.children}
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
+
+
+def test_shard_failure(pool):
+    """Check that a sharded child fails as it would on a single loop."""
+    @permissive()
+    async def a(unit: Unit):
+        unit.fail()
+
+    @permissive()
+    async def b(unit: Unit):
+        await pool.call(unit.new_child(a))
+        unit.state.outputs.update(after=True)
+
+    root = Unit(b)
+    asyncio.run(root())
+
+    assert not root
+    assert root.state.outputs == dict(after=True)
+    assert root.children[0].state.failure
+
+
+def test_shard_panic(pool):
+    """Check that panic() propagates from a sharded child."""
+    @permissive()
+    async def a(unit: Unit):
+        unit.panic()
+
+    @permissive()
+    async def b(unit: Unit):
+        await pool.call(unit.new_child(a))
+        unit.state.outputs.update(after=True)
+
+    root = Unit(b)
+
+    with pytest.raises(root.ConclusionSignal):
+        asyncio.run(root())
+
+    assert root.state.outputs == dict()
+    assert not root.state.error
+    assert root.children[0].state.error
+
+
+def test_shard_cancellation(pool):
+    """Check that cancellation of the caller reaches a sharded child."""
+    @permissive()
+    async def a(unit: Unit):
+        await asyncio.sleep(10)
+
+    @permissive()
+    async def b(unit: Unit):
+        child = unit.new_child(a)
+        task = asyncio.ensure_future(pool.call(child))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        unit.state.outputs.update(cancelled=child.state.cancelled)
+
+    root = Unit(b)
+    asyncio.run(root())
+
+    assert root.state.outputs == dict(cancelled=True)
+    assert root.children[0].state.time_stopped is not None
+
+
+def test_shard_cancellation_late(pool):
+    """Check that a caller is cancelled even if the unit finishes first."""
+    @permissive()
+    async def a(unit: Unit):
+        time.sleep(0.05)  # Blocks the remote loop, delaying the cancel.
+
+    @permissive()
+    async def b(unit: Unit):
+        child = unit.new_child(a)
+        task = asyncio.ensure_future(pool.call(child))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        unit.state.outputs.update(child=bool(child))
+
+    root = Unit(b)
+    asyncio.run(root())
+
+    assert root.state.outputs == dict(child=True)
+
+
+def test_shard_sampling(pool):
+    """Check that sampled children join their parent on its own thread."""
+    class Sampled(Unit):
+        tracing = Sampling(rate=1)
+
+    class Children(list):
+        def insert(self, index, child):
+            threads.add(threading.get_ident())
+            super().insert(index, child)
+
+    threads = set()
+
+    async def a(unit: Unit):
+        await asyncio.sleep(0.01 * (2 - unit.ordinal))
+
+    async def b(unit: Unit):
+        unit.children = Children()
+        await asyncio.gather(*(pool.call(unit.new_child(Sampled.Scaffold(
+            work=a))) for _ in range(3)))
+
+    root = Sampled(Sampled.Scaffold(work=b))
+    asyncio.run(root())
+
+    assert root
+    assert [c.ordinal for c in root.children] == [0, 1, 2]
+    assert threads == {threading.get_ident()}
+
+
+def test_shard_not_started():
+    """Check that a pool must be started before use."""
+    @permissive()
+    async def a(unit: Unit):
+        pass
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(LoopPool(1).call(Unit(a)))
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the sim module, using pytest."""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+import asyncio
+import datetime
+import time
+
+# Third party:
+import pytest
+
+# Local:
+from gunka.decorator import permissive
+from gunka.sim import run
+from gunka.unit.main import Unit
+
+
+#########
+# TESTS #
+#########
+
+
+START = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def test_virtual_sleep():
+    """Check that an hour of concurrent sleeps takes no real time."""
+    @permissive()
+    async def a(unit: Unit):
+        await asyncio.sleep(unit.state.inputs['delay'])
+
+    @permissive()
+    async def b(unit: Unit):
+        await asyncio.gather(*(
+            unit.new_child(a, new_inputs=dict(delay=60 * (i + 1)))()
+            for i in range(60)))
+
+    real = time.perf_counter()
+    summary = run(b, start=START)
+    real = time.perf_counter() - real
+
+    root = summary.root
+    assert root
+    assert real < 5
+    assert root.state.time_started == START
+    assert root.state.time_stopped == START + datetime.timedelta(hours=1)
+    last = root.children[-1]
+    assert (last.state.time_stopped - last.state.time_started ==
+            datetime.timedelta(hours=1))
+
+
+def test_virtual_timeout():
+    """Check that timeouts expire in virtual time."""
+    @permissive()
+    async def a(unit: Unit):
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(30):
+                await asyncio.sleep(3600)
+        unit.state.outputs.update(now=asyncio.get_running_loop().time())
+
+    summary = run(a, start=START)
+    assert summary.root.state.outputs['now'] == pytest.approx(30)
+
+
+def test_real_time_restored():
+    """Check that units outside a simulation use the real clock."""
+    @permissive()
+    async def a(unit: Unit):
+        pass
+
+    run(a, start=START)
+    root = Unit(a)
+    asyncio.run(root())
+    assert root.state.time_started > START + datetime.timedelta(days=1)
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the snapshot module, using pytest."""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+import asyncio
+import dataclasses
+import datetime
+import threading
+
+# Third party:
+import pytest
+
+# Local:
+from gunka.decorator import permissive
+from gunka.sampling import Sampling
+from gunka.snapshot import take
+from gunka.snapshot import take_threadsafe
+from gunka.unit.base import BaseUnit
+from gunka.unit.main import Unit
+import gunka.pred as pred
+
+
+#########
+# TESTS #
+#########
+
+
+def test_snapshot_sharing():
+    """Check that settled subtrees are shared between snapshots."""
+    snapshots = []
+
+    @permissive()
+    async def a(unit: Unit):
+        unit.state.outputs.update(done=True)
+
+    @permissive()
+    async def b(unit: Unit):
+        await unit.new_child(a)()
+        snapshots.append(take(unit))
+        await unit.new_child(a)()
+        snapshots.append(take(unit, snapshots[-1]))
+
+    root = Unit(b)
+    asyncio.run(root())
+    final = take(root, snapshots[-1])
+
+    first, second = snapshots
+    assert first.version == 1
+    assert not first.settled
+    assert len(first.children) == 1
+    assert first.children[0].settled
+    assert pred.acceptable(first.children[0])
+
+    assert second.version == 2
+    assert second.children[0] is first.children[0]
+    assert second.children[1].version == 2
+
+    assert final.settled
+    assert pred.acceptable(final)
+    assert final.children[1] is second.children[1]
+    assert take(root, final) is final
+
+
+def test_snapshot_immutable():
+    """Check that a snapshot does not follow or permit changes."""
+    @permissive()
+    async def a(unit: Unit):
+        unit.state.outputs.update(a=1)
+
+    root = Unit(a)
+    asyncio.run(root())
+    snapshot = take(root)
+    root.state.outputs.update(b=2)
+
+    assert dict(snapshot.state.outputs) == dict(a=1)
+    with pytest.raises(TypeError):
+        snapshot.state.outputs['c'] = 3
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.state.failure = True
+
+
+def test_snapshot_wide():
+    """Check that settled leading children are shared without copying."""
+    snapshots = []
+
+    @permissive()
+    async def a(unit: Unit):
+        pass
+
+    @permissive()
+    async def b(unit: Unit):
+        for _ in range(100):
+            await unit.new_child(a)()
+        snapshots.append(take(unit))
+        snapshots.append(take(unit, snapshots[-1]))
+        await unit.new_child(a)()
+        snapshots.append(take(unit, snapshots[-1]))
+
+    asyncio.run(Unit(b)())
+
+    first, second, third = snapshots
+    assert second.children is first.children
+    assert third.children[:100] == first.children
+    assert all(x is y for x, y in zip(third.children, first.children))
+    assert third.children[100].version == 3
+    assert [c.ordinal for c in third.children] == list(range(101))
+
+
+def test_snapshot_insertion():
+    """Check alignment where children are added out of order.
+
+    Under sampling, each child joins its parent only when it concludes.
+
+    """
+    class Sampled(Unit):
+        tracing = Sampling(rate=1)
+
+    async def a(unit: Unit):
+        await asyncio.sleep(0.005 * (3 - unit.ordinal))
+
+    async def b(unit: Unit):
+        task = asyncio.create_task(unit.run_children(
+            [Sampled.Scaffold(work=a)] * 4,
+            policy=Unit.FailurePolicy.ISOLATE))
+        snapshot = take(unit)
+        while not task.done():
+            await asyncio.sleep(0.001)
+            snapshot = take(unit, snapshot)
+        snapshots.append(take(unit, snapshot))
+
+    snapshots = []
+    asyncio.run(Sampled(Sampled.Scaffold(work=b))())
+
+    snapshot, = snapshots
+    assert [c.ordinal for c in snapshot.children] == [0, 1, 2, 3]
+    assert all(c.settled for c in snapshot.children)
+
+
+def test_snapshot_base():
+    """Check successive snapshots of base units, which have no ordinals."""
+    now = datetime.datetime.now()
+    root = BaseUnit()
+    root.children.extend(BaseUnit() for _ in range(2))
+    root.children[0].state.time_stopped = now
+
+    first = take(root)
+    root.children[1].state.time_stopped = now
+    root.children.append(BaseUnit())
+    second = take(root, first)
+
+    assert [c.ordinal for c in second.children] == [0, 1, 2]
+    assert second.children[0] is first.children[0]
+    assert second.children[1] is not first.children[1]
+    assert second.children[1].settled
+    assert second.children[2].version == 2
+
+
+def test_snapshot_nested():
+    """Check that nested containers are copied and frozen."""
+    @permissive()
+    async def a(unit: Unit):
+        unit.state.outputs.update(d=dict(x=[1]), s={2})
+
+    root = Unit(a)
+    asyncio.run(root())
+    snapshot = take(root)
+    root.state.outputs['d']['x'].append(3)
+    root.state.outputs['s'].add(4)
+
+    assert snapshot.state.outputs['d']['x'] == (1,)
+    assert snapshot.state.outputs['s'] == frozenset({2})
+    with pytest.raises(TypeError):
+        snapshot.state.outputs['d']['y'] = 5
+
+
+def test_snapshot_threadsafe():
+    """Check taking a snapshot from another thread."""
+    snapshots = []
+
+    def observe(unit, loop):
+        snapshots.append(take_threadsafe(unit, loop, timeout=5))
+
+    @permissive()
+    async def a(unit: Unit):
+        loop = asyncio.get_running_loop()
+        thread = threading.Thread(target=observe, args=(unit, loop))
+        thread.start()
+        while thread.is_alive():
+            await asyncio.sleep(0.001)
+
+    asyncio.run(Unit(a)())
+
+    snapshot, = snapshots
+    assert snapshot.state.time_started is not None
+    assert snapshot.state.time_stopped is None
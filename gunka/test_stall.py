@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the stall module, using pytest."""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+import asyncio
+import time
+
+# Local:
+from gunka.decorator import permissive
+from gunka.stall import StallDetector
+from gunka.unit.main import Unit
+from gunka.unit.main import current_unit
+import gunka.util as util
+
+
+#########
+# TESTS #
+#########
+
+
+def test_current_unit():
+    """Check that the current unit is tracked through nested calls."""
+    seen = []
+
+    @permissive()
+    async def a(unit: Unit):
+        seen.append(current_unit() is unit)
+
+    @permissive()
+    async def b(unit: Unit):
+        seen.append(current_unit() is unit)
+        await unit.new_child(a)()
+        seen.append(current_unit() is unit)
+
+    asyncio.run(Unit(b)())
+
+    assert seen == [True, True, True]
+    assert current_unit() is None
+
+
+def test_stall_blamed():
+    """Check that a blocking child is blamed for a stall."""
+    detector = StallDetector(threshold=0.05, stack=True)
+
+    @permissive()
+    async def polite(unit: Unit):
+        await asyncio.sleep(0.1)
+
+    @permissive()
+    async def blocking(unit: Unit):
+        await asyncio.sleep(0.01)
+        time.sleep(0.3)
+
+    @permissive()
+    async def root_work(unit: Unit):
+        async with detector:
+            await asyncio.gather(unit.new_child(polite)(),
+                                 unit.new_child(blocking)())
+
+    root = Unit(root_work)
+    asyncio.run(root())
+
+    polite_unit, blocking_unit = root.children
+    assert polite_unit.state.stalls is None
+    stall, = blocking_unit.state.stalls
+    assert stall.seconds > 0.2
+    assert any('time.sleep' in line for line in stall.stack)
+
+    assert detector.metrics.count == 1
+    tally = detector.metrics.by_work[util.work_name(blocking_unit)]
+    assert tally.count == 1
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the trace module, using pytest."""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+import asyncio
+import json
+import uuid
+
+# Local:
+from gunka.decorator import permissive
+from gunka.trace import TraceWriter
+from gunka.unit.main import Unit
+from gunka.unit.main import observed
+
+
+#########
+# TESTS #
+#########
+
+
+def test_trace_events(tmp_path):
+    """Check the events written for a small tree."""
+    application = uuid.uuid4()
+
+    @permissive(uuid_application=application, title='leaf')
+    async def a(unit: Unit):
+        await asyncio.sleep(0.001)
+
+    @permissive()
+    async def b(unit: Unit):
+        await unit.new_child(a)()
+        await unit.run_children((a, a), policy=unit.FailurePolicy.ISOLATE)
+
+    path = tmp_path / 'trace.json'
+    with TraceWriter(str(path)) as writer, observed(writer):
+        asyncio.run(Unit(b)())
+
+    events = json.loads(path.read_text())
+    slices = [e for e in events if e['ph'] in 'BE']
+    lanes = {e['tid'] for e in slices}
+
+    assert len(slices) == 8
+    assert len(lanes) == 3  # The root task and two child tasks.
+    assert len([e for e in events if e['ph'] == 'M']) == 3
+
+    root_lane = slices[0]['tid']
+    assert [e['ph'] for e in slices if e['tid'] == root_lane] == [
+        'B', 'B', 'E', 'E']
+    assert slices[1]['name'] == 'leaf'
+    assert slices[1]['args'] == dict(application=str(application),
+                                     title='leaf', position=[0])
+    assert slices[-1]['args']['failure'] is False
+
+    starts = [e for e in events if e['ph'] == 's']
+    finishes = [e for e in events if e['ph'] == 'f']
+    assert len(starts) == len(finishes) == 2
+    assert {e['tid'] for e in starts} == {root_lane}
+    assert {e['tid'] for e in finishes} == lanes - {root_lane}
+    assert {e['id'] for e in starts} == {e['id'] for e in finishes}
+    positions = [e['args']['position'] for e in slices if e['ph'] == 'B']
+    assert sorted(positions) == [[], [0], [1], [2]]
+
+
+def test_trace_lanes_reused(tmp_path):
+    """Check that lanes of finished tasks are reused."""
+    @permissive()
+    async def a(unit: Unit):
+        await asyncio.sleep(0.001)
+
+    @permissive()
+    async def b(unit: Unit):
+        for _ in range(5):
+            await unit.run_children((a, a),
+                                    policy=unit.FailurePolicy.ISOLATE)
+
+    path = tmp_path / 'trace.json'
+    with TraceWriter(str(path)) as writer, observed(writer):
+        asyncio.run(Unit(b)())
+
+    events = json.loads(path.read_text())
+    lanes = {e['tid'] for e in events if e['ph'] in 'BE'}
+    assert len([e for e in events if e['ph'] == 'B']) == 11
+    assert len(lanes) == 3
+
+
+def test_trace_unclosed(tmp_path):
+    """Check that events are written before the writer is closed."""
+    @permissive()
+    async def a(unit: Unit):
+        pass
+
+    path = tmp_path / 'trace.json'
+    writer = TraceWriter(str(path))
+    with observed(writer):
+        asyncio.run(Unit(a)())
+    writer._file.flush()
+
+    assert json.loads(path.read_text() + ']')
+    writer.close()
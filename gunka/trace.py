@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""Streaming export of unit execution as trace events.
+
+The output is in the JSON array format of the Trace Event Format, as read by
+Perfetto and by Chrome’s trace viewer. Each unit appears as a slice from its
+start to its stop. Each asyncio task appears as a lane (a thread, in the
+terms of the format), so that units nest on a lane as they await each other,
+while concurrent units appear side by side.
+
+Where a unit starts on a different lane from its parent, as in a task of its
+own, a flow event links the slice of the parent to that of the child. Every
+slice also carries the position of its unit in the tree, as a list of
+ordinals. Once a task is done, its lane is free for another task, so the
+number of lanes follows the number of tasks that run at the same time, not
+the total.
+
+Events are written as they happen. The array is closed when the writer is
+closed, but viewers also accept a file that was cut short by a crash.
+
+"""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+import asyncio
+import heapq
+import json
+import os
+import threading
+
+# Local:
+from gunka.unit.main import Observer
+from gunka.unit.main import Unit
+import gunka.util as util
+
+
+#############
+# INTERFACE #
+#############
+
+
+class TraceWriter(Observer):
+    """An observer of units that writes trace events to a file.
+
+    Use an instance as a context manager, together with gunka.unit.main’s
+    observed() function, as in:
+
+        with TraceWriter('run.json') as writer, observed(writer):
+            asyncio.run(root())
+
+    """
+
+    def __init__(self, path: str, pid: int = None):
+        """Initialize. Open the file and start the array of events."""
+        self.pid = os.getpid() if pid is None else pid
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file.write('[')
+        self._first = True
+        self._lock = threading.Lock()
+        self._lanes: Dict[asyncio.Task, int] = dict()
+        self._free: List[int] = list()  # A heap of lanes to reuse.
+        self._next_lane = 1
+        self._open: Dict[Unit, int] = dict()  # Lanes of running units.
+        self._next_flow = 1
+
+    def __enter__(self):
+        """Enter a context where the writer is open."""
+        return self
+
+    def __exit__(self, *_):
+        """Close the writer."""
+        self.close()
+
+    def close(self):
+        """End the array of events and close the file."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.write('\n]\n')
+                self._file.close()
+
+    def started(self, unit: Unit):
+        """Begin a slice for the passed unit."""
+        ts = unit.state.time_started.timestamp() * 1e6
+        args = _describe(unit)
+        args['position'] = list(util.position(unit))
+
+        task = _current_task()
+        with self._lock:
+            lane = self._lane(task)
+            origin = self._open.get(unit.parent)
+            self._open[unit] = lane
+            self._write(dict(ph='B', name=_name(unit), cat='unit', ts=ts,
+                             pid=self.pid, tid=lane, args=args))
+            if origin is not None and origin != lane:
+                flow = self._next_flow
+                self._next_flow += 1
+                self._write(dict(ph='s', name='child', cat='unit', id=flow,
+                                 ts=ts, pid=self.pid, tid=origin))
+                self._write(dict(ph='f', bp='e', name='child', cat='unit',
+                                 id=flow, ts=ts, pid=self.pid, tid=lane))
+
+    def stopped(self, unit: Unit):
+        """End the slice of the passed unit."""
+        event = dict(ph='E',
+                     ts=unit.state.time_stopped.timestamp() * 1e6,
+                     pid=self.pid,
+                     args=dict(cancelled=unit.state.cancelled,
+                               error=unit.state.error,
+                               failure=unit.state.failure))
+
+        task = _current_task()
+        with self._lock:
+            self._open.pop(unit, None)
+            event['tid'] = self._lane(task)
+            self._write(event)
+
+    ############
+    # INTERNAL #
+    ############
+
+    def _lane(self, task: Optional[asyncio.Task]) -> int:
+        """Find the lane of the passed task, with the lock already held.
+
+        A new task takes the lowest free lane. A new lane is named once.
+
+        """
+        if task is None:
+            return 0
+
+        lane = self._lanes.get(task)
+        if lane is not None:
+            return lane
+
+        if self._free:
+            lane = heapq.heappop(self._free)
+        else:
+            lane = self._next_lane
+            self._next_lane += 1
+            self._write(dict(ph='M', name='thread_name', pid=self.pid,
+                             tid=lane, args=dict(name=f'Lane {lane}')))
+        self._lanes[task] = lane
+        task.add_done_callback(self._release)
+        return lane
+
+    def _release(self, task: asyncio.Task):
+        """Free the lane of a task that is done."""
+        with self._lock:
+            heapq.heappush(self._free, self._lanes.pop(task))
+
+    def _write(self, event: Dict[str, Any]):
+        """Write one event with the lock already held."""
+        self._file.write('\n' if self._first else ',\n')
+        self._first = False
+        self._file.write(json.dumps(event, default=str))
+
+
+############
+# INTERNAL #
+############
+
+
+def _current_task() -> Optional[asyncio.Task]:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+def _name(unit: Unit) -> str:
+    title = getattr(getattr(unit, 'ui', None), 'title', None)
+    if title:
+        return title
+    return getattr(unit._work, '__qualname__', repr(unit._work))
+
+
+def _describe(unit: Unit) -> Dict[str, Any]:
+    args = dict()
+    identification = getattr(unit, 'id', None)
+    if identification is not None:
+        for name in ('application', 'context', 'instance', 'result'):
+            value = getattr(identification, name, None)
+            if value is not None:
+                args[name] = str(value)
+    interface = getattr(unit, 'ui', None)
+    if interface is not None and interface.title is not None:
+        args['title'] = interface.title
+    return args
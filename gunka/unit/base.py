@@ -14,6 +14,7 @@ from typing import Any
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
 from uuid import UUID
 import datetime
 
@@ -50,6 +51,39 @@ class BaseUnit():
         title: Optional[str] = field(default=None)
         result: Optional[str] = field(default=None)
 
+    @dataclass(frozen=True)
+    class Tally():
+        """Aggregate figures on units no longer recorded individually."""
+
+        count: int = field(default=0)
+        seconds: float = field(default=0.0)
+        squares: float = field(default=0.0)  # Sum of squared seconds.
+
+    @dataclass(frozen=True)
+    class Allocation():
+        """Memory allocated by a unit of work, in bytes.
+
+        Net figures are what remained allocated when the unit stopped,
+        relative to when it started. Peak figures are the highest allocation
+        above that starting point. Self figures exclude children: the self
+        net excludes the net of children, while the self peak is taken only
+        when no child of the unit was running, less the net of those children
+        that had stopped.
+
+        """
+
+        net: int = field(default=0)
+        peak: int = field(default=0)
+        self_net: int = field(default=0)
+        self_peak: int = field(default=0)
+
+    @dataclass(frozen=True)
+    class Stall():
+        """An event loop blocked while a unit was performing work."""
+
+        seconds: float = field(default=0.0)
+        stack: Optional[Tuple[str, ...]] = field(default=None)
+
     @dataclass()
     class State():
         """The state of a unit of work.
@@ -74,6 +108,12 @@ class BaseUnit():
         These three Boolean properties should only be checked when the unit is
         complete. Their order of precedence is as listed here.
 
+        The ‘elided’ property holds tallies of descendants that were not kept
+        as children, by application UUID, where tracing is sampled.
+
+        The ‘memory’ property is populated only where memory is profiled, and
+        the ‘stalls’ property only where stalls are detected.
+
         """
 
         # Chronological state. Defaults mean neither started nor stopped.
@@ -89,6 +129,14 @@ class BaseUnit():
         error: bool = field(default=True)       # Deliberate pessimism.
         failure: bool = field(default=True)     # Deliberate pessimism.
 
+        # Aggregates in place of children.
+        elided: Optional[Dict[Optional[UUID], 'BaseUnit.Tally']] = field(
+            default=None)
+
+        # Optional instrumentation.
+        memory: Optional['BaseUnit.Allocation'] = field(default=None)
+        stalls: Optional[List['BaseUnit.Stall']] = field(default=None)
+
     def __init__(self):
         """Initialize."""
         self._work = None
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""Durable checkpoints of completed units, for resuming interrupted work.
+
+A journal records each acceptable unit as soon as it and its descendants are
+done. Records are appended to a file, one at a time, so that a crash loses
+at most the record being written.
+
+A checkpointed unit with a journal looks itself up in the journal before
+performing its work. If found, its state and children are restored from the
+record and the work is skipped. Units that were incomplete, failed or in
+error when the journal was written have no records and are performed again.
+
+Records are keyed by the position of the unit in its tree, its application
+UUID and a hash of its inputs. Positions are ordinals of creation, so resuming
+is reliable only where each parent creates its children in a consistent
+order. Inputs, outputs and identifying metadata must be picklable.
+
+"""
+
+###########
+# IMPORTS #
+###########
+
+
+# Future:
+from __future__ import annotations
+
+# Standard:
+from copy import deepcopy
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from uuid import UUID
+import hashlib
+import os
+import pickle
+
+# Local:
+from gunka.unit.main import Unit
+import gunka.pred as pred
+import gunka.util as util
+
+
+#########
+# TYPES #
+#########
+
+
+# Position in tree, application UUID and a digest of inputs.
+Key = Tuple[Tuple[int, ...], Optional[UUID], str]
+
+
+#############
+# INTERFACE #
+#############
+
+
+def digest(inputs: Dict[str, Any]) -> str:
+    """Hash the passed inputs of a unit.
+
+    The hash is the same for equal inputs in any process. Dictionaries and
+    sets are hashed without regard to the order of their contents, at any
+    depth of lists, tuples, dictionaries and sets. Other values are hashed
+    by their pickled form, which must itself be consistent.
+
+    """
+    return hashlib.sha256(_canonical(inputs)).hexdigest()
+
+
+class Journal():
+    """A durable, append-only file of records of acceptable units.
+
+    Existing records are loaded from the file on initialization. A record
+    truncated by a crash while it was being written is discarded.
+
+    With fsync set, each record is flushed to storage before work continues.
+    This is safer but slower.
+
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        """Initialize."""
+        self.path = path
+        self.fsync = fsync
+        self.records: Dict[Key, Dict[str, Any]] = dict()
+        self._load()
+        self._file = open(path, 'ab')
+
+    def __enter__(self):
+        """Enter a context where the journal is open."""
+        return self
+
+    def __exit__(self, *_):
+        """Close the journal."""
+        self.close()
+
+    def close(self):
+        """Close the file of the journal."""
+        self._file.close()
+
+    def get(self, key: Key) -> Optional[Dict[str, Any]]:
+        """Look up a record."""
+        return self.records.get(key)
+
+    def put(self, key: Key, record: Dict[str, Any]):
+        """Add a record to the journal and its file."""
+        self.records[key] = record
+        pickle.dump((key, record), self._file, protocol=4)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    ############
+    # INTERNAL #
+    ############
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'rb') as f:
+            good = 0
+            while True:
+                try:
+                    key, record = pickle.load(f)
+                except EOFError:
+                    break
+                except (pickle.UnpicklingError, ValueError, TypeError):
+                    # Damaged by an interrupted write. Drop the remainder.
+                    break
+                self.records[key] = record
+                good = f.tell()
+
+        if good < os.path.getsize(self.path):
+            os.truncate(self.path, good)
+
+
+class CheckpointedUnit(Unit):
+    """A unit that can be recorded in and resumed from a journal.
+
+    The journal of the root is inherited by its descendants. A unit without
+    a journal works like any other unit.
+
+    """
+
+    def __init__(self, scaffold, journal: Optional[Journal] = None):
+        """Initialize."""
+        super().__init__(scaffold)
+        self.journal = journal
+        self._key: Optional[Key] = None
+        self._checkpointed = False
+
+    def new_child(self, *args, **kwargs):
+        """Create and register a new child unit, sharing the journal."""
+        child = super().new_child(*args, **kwargs)
+        child.journal = self.journal
+        return child
+
+    def key(self) -> Key:
+        """Identify the unit for the purpose of checkpointing."""
+        application = getattr(getattr(self, 'id', None), 'application', None)
+        return (util.position(self), application, digest(self.state.inputs))
+
+    async def __call__(self) -> CheckpointedUnit:
+        """Perform work, unless it is already recorded. Return self.
+
+        After performing work, record the unit if it is acceptable and all of
+        its children were recorded.
+
+        """
+        if self.journal is None:
+            return await super().__call__()
+
+        key = self._key = self.key()
+        record = self.journal.get(key)
+        if record is not None and self._restore(record):
+            self._register()  # With the parent, as on conclusion.
+            return self
+
+        await super().__call__()
+
+        if pred.acceptable(self) and all(getattr(c, '_checkpointed', False)
+                                         for c in self.children):
+            self.journal.put(key, self._record())
+            self._checkpointed = True
+
+        return self
+
+    ############
+    # INTERNAL #
+    ############
+
+    def _record(self) -> Dict[str, Any]:
+        return dict(state=self.state,
+                    id=getattr(self, 'id', None),
+                    ui=getattr(self, 'ui', None),
+                    children=[c._key for c in self.children])
+
+    def _restore(self, record: Dict[str, Any]) -> bool:
+        """Restore state and children from a record. Return success.
+
+        Restored children carry no work function of their own.
+
+        """
+        children: List[CheckpointedUnit] = []
+        for key in record['children']:
+            child_record = self.journal.get(key)
+            if child_record is None:
+                return False
+            child = type(self)(self.Scaffold(work=_restored),
+                               journal=self.journal)
+            child.parent = self
+            child.ordinal = key[0][-1]
+            child._key = key
+            if not child._restore(child_record):
+                return False
+            children.append(child)
+
+        self.state = deepcopy(record['state'])
+        if record['id'] is not None:
+            self.id = deepcopy(record['id'])
+        if record['ui'] is not None:
+            self.ui = deepcopy(record['ui'])
+        self.children = children
+        self._checkpointed = True
+        return True
+
+
+############
+# INTERNAL #
+############
+
+
+def _canonical(value: Any) -> bytes:
+    """Encode a value as bytes, independent of order in unordered types.
+
+    Each encoding is tagged and prefixed with its length, so that the
+    concatenation of several encodings is unambiguous.
+
+    """
+    if isinstance(value, dict):
+        tag = b'd'
+        parts = sorted(_canonical(k) + _canonical(v)
+                       for k, v in value.items())
+    elif isinstance(value, (set, frozenset)):
+        tag = b's'
+        parts = sorted(_canonical(v) for v in value)
+    elif isinstance(value, (list, tuple)):
+        tag = b'l' if isinstance(value, list) else b't'
+        parts = [_canonical(v) for v in value]
+    else:
+        tag = b'p'
+        parts = [pickle.dumps(value, protocol=4)]
+    body = b''.join(parts)
+    return tag + len(body).to_bytes(8, 'big') + body
+
+
+async def _restored(unit: Unit):
+    """Stand in for the work function of a unit restored from a record."""
@@ -10,7 +10,11 @@
 from __future__ import annotations
 
 # Standard:
+from contextlib import contextmanager
+from contextvars import Context
+from contextvars import ContextVar
 from copy import deepcopy
+from dataclasses import dataclass
 from dataclasses import field
 from dataclasses import make_dataclass
 from dataclasses import replace
@@ -18,16 +22,26 @@ from typing import Any
 from typing import Awaitable
 from typing import Callable
 from typing import Dict
+from typing import Iterable
+from typing import List
 from typing import Optional
+from typing import Tuple
 from typing import Type
 import asyncio
 import datetime
+import enum
 import inspect
+import threading
+import time
 
 # Local:
 from gunka.exc import Signal
+from gunka.resource import ResourcePool
+from gunka.sampling import Sampling
 from gunka.unit.base import BaseUnit
 import gunka.pred as pred
+import gunka.resource as resource
+import gunka.sampling as sampling
 import gunka.util as util
 
 
@@ -43,27 +57,125 @@ def get_current_time() -> datetime.datetime:
     as a bare-bones alternative to using a higher-level, more easily patched
     third-party library for time.
 
+    Within a context where a clock has been set, as for a simulation, use that
+    clock instead.
+
     """
+    clock = _clock.get()
+    if clock is not None:
+        return clock()
     return datetime.datetime.now(tz=datetime.timezone.utc)
 
 
+@contextmanager
+def clocked(clock: Callable[[], datetime.datetime]):
+    """Replace the source of timestamps for units, within a context."""
+    token = _clock.set(clock)
+    try:
+        yield
+    finally:
+        _clock.reset(token)
+
+
+@contextmanager
+def metered(meter: Meter):
+    """Measure the overhead of units on the passed meter, within a context.
+
+    Units performed in the context, including those in tasks created there,
+    add their overhead to the meter as they stop.
+
+    """
+    token = _meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _meter.reset(token)
+
+
 def has_scaffold(cls: Type[Unit]):
     """Annotate a new class of unit with a scaffold for instantiating it."""
     cls.Scaffold = make_dataclass(
         'Scaffold',
-        [('work', Callable[[cls], Awaitable[None]]),
+        [('work', Callable[[cls], Awaitable[Optional[cls.Conclusion]]]),
          ('id', Optional[cls.Identification], field(default=None)),
          ('ui', Optional[cls.UserInterface], field(default=None)),
+         ('pools', Tuple[ResourcePool, ...], field(default=())),
          ],
     )
     return cls
 
 
+def current_unit(context: Optional[Context] = None) -> Optional[Unit]:
+    """Get the unit currently performing work, if any.
+
+    By default, look in the current context. A specific context, such as that
+    of another task, can be passed instead.
+
+    """
+    if context is None:
+        return _current.get()
+    return context.get(_current)
+
+
+@contextmanager
+def observed(*observers: Observer):
+    """Add observers of units, within a context.
+
+    Units performed in the context, including those in tasks created there,
+    notify the observers as they start and stop.
+
+    """
+    token = _observers.set(_observers.get() + observers)
+    try:
+        yield
+    finally:
+        _observers.reset(token)
+
+
 #####################
 # INTERFACE CLASSES #
 #####################
 
 
+class Observer():
+    """A recipient of notifications from units as they start and stop.
+
+    Notifications are synchronous, on the thread of the unit. This base class
+    ignores them.
+
+    """
+
+    def started(self, unit: Unit):
+        """Note that the passed unit has started its work."""
+
+    def stopped(self, unit: Unit):
+        """Note that the passed unit, having started, has stopped."""
+
+
+class Meter():
+    """An accumulator of the overhead of units.
+
+    The overhead of a unit is the time spent in its __call__ method outside
+    its work function: taking timestamps, notifying observers, applying its
+    conclusion, sampling and so on. Waiting for resource pools is excluded,
+    as are the creation of the unit and the scheduling of any task that runs
+    it. Units may add to a meter from several threads.
+
+    """
+
+    def __init__(self):
+        """Initialize."""
+        self.units = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        """Note the overhead of one unit."""
+        with self._lock:
+            self.units += 1
+            self.seconds += seconds
+
+
 @has_scaffold
 class Unit(BaseUnit):
     """An encapsulated unit of work ready for cooperative concurrency.
@@ -82,14 +194,59 @@ class Unit(BaseUnit):
             self.error = error
             self.propagate = propagate
 
+    @dataclass(frozen=True)
+    class Conclusion():
+        """A marker to conclude work without raising a signal.
+
+        A work function may return an instance of this class instead of
+        calling succeed(), fail() or panic(). This is cheaper, because no
+        exception is created or unwound, but it only concludes the work when
+        the work function returns. A conclusion that propagates is converted
+        to a signal by the unit, preserving the semantics of panic().
+
+        """
+
+        failure: bool = field(default=True)
+        error: bool = field(default=False)
+        propagate: bool = field(default=False)
+
+    SUCCESS = Conclusion(failure=False)
+    FAILURE = Conclusion()
+    PANIC = Conclusion(error=True, propagate=True)
+
+    class FailurePolicy(enum.Enum):
+        """A policy for the siblings of a failed child under run_children.
+
+        FAIL_FAST cancels all pending siblings as soon as one child does not
+        succeed. ISOLATE lets every sibling run to completion regardless.
+        QUORUM cancels pending siblings as soon as a required number of
+        children have succeeded, or as soon as that number can no longer be
+        reached.
+
+        """
+
+        FAIL_FAST = enum.auto()
+        ISOLATE = enum.auto()
+        QUORUM = enum.auto()
+
     # Refer to the has_scaffold function.
     Scaffold: Type
 
+    # A policy for sampled tracing, or None to record every unit in full.
+    # Refer to the sampling module.
+    tracing: Optional[Sampling] = None
+
     def __init__(self, scaffold):
         assert isinstance(scaffold, self.Scaffold)
         super().__init__()
 
         self._work = scaffold.work
+        self._pools = scaffold.pools
+
+        # The position of the unit in its family tree.
+        self.parent: Optional[Unit] = None
+        self.ordinal: int = 0
+        self._spawned = 0
 
         if scaffold.id is not None:
             self.id = replace(scaffold.id)
@@ -116,10 +273,139 @@ class Unit(BaseUnit):
         if new_inputs is not None:
             child.state.inputs.update(new_inputs)
 
-        self.children.append(child)
+        self._adopt(child)
 
         return child
 
+    async def run_children(self, scaffolds: Iterable,
+                           *,
+                           policy: Unit.FailurePolicy,
+                           quorum: Optional[int] = None,
+                           **kwargs,
+                           ) -> List[Unit]:
+        """Create child units from scaffolds and run them concurrently.
+
+        Each child runs as its own task in an asyncio.TaskGroup. Keyword
+        arguments are passed on to new_child. Return the new children, in
+        the order of their scaffolds.
+
+        Under isolation, the cost per child is that of the task group alone,
+        on a par with asyncio.gather. Other policies wrap each child to count
+        its conclusion, which costs a little more. Run python3 -m gunka.bench
+        for figures.
+
+        The policy determines the treatment of siblings when a child concludes
+        without success, without raising. Raised exceptions, including
+        propagating conclusion signals from panic(), always cancel all
+        siblings. The first of them is re-raised here as it is, not wrapped
+        in an exception group. Any others, raised by siblings before they
+        could be cancelled, are chained to it as its cause, in a group.
+
+        For a quorum, pass the number of children that must succeed, from one
+        up to the number of scaffolds.
+
+        A child cancelled under the policy is marked as cancelled even if its
+        work never started. Cancellation of the children does not mark this
+        unit as cancelled, unless this unit was itself cancelled.
+
+        """
+        scaffolds = list(scaffolds)
+
+        if policy is self.FailurePolicy.QUORUM:
+            if quorum is None or not 1 <= quorum <= len(scaffolds):
+                raise ValueError(f'Invalid quorum: {quorum!r}.')
+        elif quorum is not None:
+            raise ValueError(f'Quorum without quorum policy: {policy}.')
+
+        children = [self.new_child(s, **kwargs) for s in scaffolds]
+
+        if policy is self.FailurePolicy.QUORUM:
+            needed, allowed = quorum, len(children) - quorum
+        else:
+            needed, allowed = len(children) + 1, 0
+
+        tasks: List[asyncio.Task] = []
+        successes = failures = 0
+        cancelling = False
+
+        async def watched(child: Unit) -> Unit:
+            # Cheaper than a done callback, which takes a turn of the loop.
+            nonlocal successes, failures, cancelling
+            await child()
+
+            if pred.nonerror_success(child):
+                successes += 1
+            else:
+                failures += 1
+
+            if not cancelling and (successes >= needed or
+                                   failures > allowed):
+                cancelling = True
+                current = asyncio.current_task()
+                for t in tasks:
+                    if t is not current:
+                        t.cancel()  # No effect on tasks already done.
+            return child
+
+        completed = False
+        try:
+            async with asyncio.TaskGroup() as group:
+                # Under isolation, no child concludes for its siblings, so
+                # there is nothing to observe until the group is done.
+                if policy is self.FailurePolicy.ISOLATE:
+                    tasks[:] = [group.create_task(c()) for c in children]
+                else:
+                    tasks[:] = [group.create_task(watched(c))
+                                for c in children]
+            completed = True
+        except BaseExceptionGroup as group:
+            first, *others = group.exceptions
+            if not others:
+                raise first from None
+            raise first from BaseExceptionGroup('Also raised by siblings.',
+                                                others)
+        finally:
+            if not completed or cancelling:
+                self._attribute_cancellation(children, tasks)
+
+        return children
+
+    async def pipeline(self, scaffolds: Iterable,
+                       inputs: Optional[Dict[str, Any]] = None,
+                       cls: Type[Unit] = None,
+                       ) -> List[Unit]:
+        """Create child units from scaffolds and run them one at a time.
+
+        This is shorthand for awaiting new children in sequence without
+        copying inputs. Each child is made by new_child and performed as
+        usual, so the cost per child is the same as in such a loop, and lower
+        than with copies of inputs only by the cost of the copy.
+
+        The first child takes the passed inputs, defaulting to those of self.
+        Each later child takes the outputs of the child before it. None of
+        these dictionaries are copied, so children must not modify their
+        inputs.
+
+        Stop after the first child that does not succeed without error.
+        Conclusions that propagate do so as usual. Return the children that
+        were run.
+
+        """
+        current = self.state.inputs if inputs is None else inputs
+        children = []
+        for scaffold in scaffolds:
+            child = self.new_child(scaffold, cls=cls, copy_inputs=False)
+            child.state.inputs = current
+            children.append(child)
+
+            await child()
+
+            if child.state.error or child.state.failure:
+                break
+            current = child.state.outputs
+
+        return children
+
     def succeed(self, **kwargs):
         """Retire. Note a success, leaving any remaining work undone."""
         self.state.failure = False
@@ -138,6 +424,18 @@ class Unit(BaseUnit):
 
         Ensure work is not performed more than once.
 
+        Before work starts, wait for any resource pools named by the scaffold.
+        Time spent waiting is not part of the unit’s own time.
+
+        Apply any conclusion returned by the work function. A return value of
+        None, like any other value that is not a Conclusion, means success.
+
+        Under a sampling policy for tracing, the unit joins its parent’s
+        children only now, unless it concluded cleanly and was folded into
+        its parent’s tallies instead.
+
+        Within a metered context, add the overhead of the unit to the meter.
+
         While performing work, catch BaseExceptions relevant to the framework.
         By design, general exceptions are not caught, in order to maximize
         their visibility.
@@ -146,9 +444,33 @@ class Unit(BaseUnit):
         assert self.state.time_started is None
         assert inspect.iscoroutinefunction(self._work)
 
+        meter = _meter.get()
+        if meter is not None:
+            tick = time.perf_counter()  # Start of a stretch of overhead.
+            spent = 0.0
+
+        observers = _observers.get()
+        token = _current.set(self)
+        acquired = ()
         try:
+            if self._pools:
+                if meter is not None:
+                    spent += time.perf_counter() - tick
+                try:
+                    acquired = await resource.acquire_all(self._pools)
+                finally:
+                    if meter is not None:
+                        tick = time.perf_counter()
             self.state.time_started = get_current_time()
-            await self._work(self)
+            for observer in observers:
+                observer.started(self)
+            if meter is not None:
+                spent += time.perf_counter() - tick
+            try:
+                conclusion = await self._work(self)
+            finally:
+                if meter is not None:
+                    tick = time.perf_counter()
         except asyncio.CancelledError:
             self.state.cancelled = True
             raise  # Propagated for signalling.
@@ -158,14 +480,63 @@ class Unit(BaseUnit):
                 signal.error = False
                 raise
         else:
-            # Work passed without incident: No known error or failure occurred.
-            self.state.error = False
-            self.state.failure = False
+            if isinstance(conclusion, self.Conclusion):
+                self.state.error = conclusion.error
+                self.state.failure = conclusion.failure
+                if conclusion.propagate:
+                    raise self.ConclusionSignal(self, propagate=True)
+            else:
+                # Work passed without incident: No error or failure occurred.
+                self.state.error = False
+                self.state.failure = False
         finally:
+            if acquired:
+                resource.release_all(acquired)
             self.state.time_stopped = get_current_time()
+            _current.reset(token)
+            if self.state.time_started is not None:
+                for observer in observers:
+                    observer.stopped(self)
+            self._register()
+            if meter is not None:
+                meter.add(spent + time.perf_counter() - tick)
 
         return self
 
+    def _attribute_cancellation(self, children: List[Unit],
+                                tasks: List[asyncio.Task]):
+        """Mark children whose tasks were cancelled, even before starting."""
+        for child, task in zip(children, tasks):
+            if task.cancelled():
+                child.state.cancelled = True
+                if (child.state.time_stopped is None and
+                        child.tracing is not None):
+                    sampling.conclude(child, child.tracing)
+
+    def _register(self):
+        """Apply any sampling policy to self, on conclusion.
+
+        Under a sampling policy, this is where self joins the children of its
+        parent, unless that is left to whoever performed self on a different
+        event loop.
+
+        """
+        if self.tracing is not None and _detached.get() is not self:
+            sampling.conclude(self, self.tracing)
+
+    def _adopt(self, child: Unit):
+        """Register a new child unit of self.
+
+        Under a sampling policy, the child is not added to the children of
+        self until it concludes. Refer to the sampling module.
+
+        """
+        child.parent = self
+        child.ordinal = self._spawned
+        self._spawned += 1
+        if child.tracing is None:
+            self.children.append(child)
+
     def __bool__(self):
         """Represent the unit of work in a Boolean context.
 
@@ -174,3 +545,20 @@ class Unit(BaseUnit):
 
         """
         return util.first(lambda u: not pred.acceptable(u), self) is None
+
+
+############
+# INTERNAL #
+############
+
+
+_observers: ContextVar[Tuple[Observer, ...]] = ContextVar('observers',
+                                                          default=())
+_current: ContextVar[Optional[Unit]] = ContextVar('current', default=None)
+_clock: ContextVar[Optional[Callable[[], datetime.datetime]]] = ContextVar(
+    'clock', default=None)
+
+_meter: ContextVar[Optional[Meter]] = ContextVar('meter', default=None)
+
+# A unit performed away from the thread of its parent, as on a loop pool.
+_detached: ContextVar[Optional[Unit]] = ContextVar('detached', default=None)
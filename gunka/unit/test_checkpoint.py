@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the checkpoint module, using pytest."""
+
+###########
+# IMPORTS #
+###########
+
+
+# Standard:
+import asyncio
+import os
+import subprocess
+import sys
+import uuid
+
+# Third party:
+import pytest
+
+# Local:
+from gunka.sampling import Sampling
+from gunka.unit.checkpoint import CheckpointedUnit
+from gunka.unit.checkpoint import Journal
+from gunka.unit.checkpoint import digest
+import gunka
+import gunka.util as util
+
+
+##################
+# WORK FUNCTIONS #
+##################
+
+
+def scaffold(work):
+    """Make a scaffold with a fresh application UUID."""
+    identification = CheckpointedUnit.Identification(application=uuid.uuid4())
+    return CheckpointedUnit.Scaffold(work=work, id=identification)
+
+
+#########
+# TESTS #
+#########
+
+
+@pytest.fixture()
+def tree():
+    """Provide a tree whose second leaf fails on its first attempt.
+
+    Return the scaffold of the root and a log of work performed.
+
+    """
+    log = []
+    attempts = []
+
+    async def leaf(unit):
+        log.append(('leaf', unit.state.inputs['n']))
+        if unit.state.inputs['n'] == 1:
+            attempts.append(unit)
+            if len(attempts) == 1:
+                unit.fail()
+        unit.state.outputs.update(square=unit.state.inputs['n'] ** 2)
+
+    leaf_scaffold = scaffold(leaf)
+
+    async def branch(unit):
+        log.append(('branch',))
+        for n in range(3):
+            await unit.new_child(leaf_scaffold, new_inputs=dict(n=n))()
+
+    return scaffold(branch), log
+
+
+def test_position():
+    """Check that units know their position in the tree."""
+    async def leaf(unit):
+        pass
+
+    async def branch(unit):
+        await unit.new_child(scaffold(leaf))()
+        work = branch if unit.parent is None else leaf
+        await unit.new_child(scaffold(work))()
+
+    root = CheckpointedUnit(scaffold(branch))
+    asyncio.run(root())
+
+    assert util.position(root) == ()
+    assert [util.position(u) for u in util.preorder(root)] == [
+        (), (0,), (1,), (1, 0), (1, 1)]
+
+
+def test_resume(tmp_path, tree):
+    """Check that a second run resumes only the incomplete work."""
+    root_scaffold, log = tree
+    path = str(tmp_path / 'journal')
+
+    with Journal(path) as journal:
+        first = CheckpointedUnit(root_scaffold, journal=journal)
+        asyncio.run(first())
+
+    assert not first
+    assert log == [('branch',), ('leaf', 0), ('leaf', 1), ('leaf', 2)]
+    log.clear()
+
+    with Journal(path) as journal:
+        second = CheckpointedUnit(root_scaffold, journal=journal)
+        asyncio.run(second())
+
+    assert second
+    assert log == [('branch',), ('leaf', 1)]
+    assert [c.state.outputs for c in second.children] == [
+        dict(square=0), dict(square=1), dict(square=4)]
+    log.clear()
+
+    with Journal(path) as journal:
+        third = CheckpointedUnit(root_scaffold, journal=journal)
+        asyncio.run(third())
+
+    assert third
+    assert log == []
+    assert len(third.children) == 3
+    assert third.children[2].state.outputs == dict(square=4)
+    assert util.position(third.children[2]) == (2,)
+
+
+def test_resume_sampled(tmp_path, tree):
+    """Check that restored units rejoin their parents under sampling."""
+    class Sampled(CheckpointedUnit):
+        tracing = Sampling(rate=1)
+
+    root_scaffold, log = tree
+    path = str(tmp_path / 'journal')
+
+    for _ in range(2):
+        with Journal(path) as journal:
+            unit = Sampled(root_scaffold, journal=journal)
+            asyncio.run(unit())
+
+    assert unit
+    assert log[-2:] == [('branch',), ('leaf', 1)]
+    assert [c.ordinal for c in unit.children] == [0, 1, 2]
+    log.clear()
+
+    with Journal(path) as journal:
+        third = Sampled(root_scaffold, journal=journal)
+        asyncio.run(third())
+
+    assert third
+    assert log == []
+    assert len(third.children) == 3
+
+
+def test_pipeline(tmp_path):
+    """Check that children in a pipeline share the journal."""
+    log = []
+
+    async def increment(unit):
+        log.append(unit.state.inputs['n'])
+        unit.state.outputs.update(n=unit.state.inputs['n'] + 1)
+
+    stage = scaffold(increment)
+
+    async def root_work(unit):
+        children = await unit.pipeline([stage] * 3, inputs=dict(n=0))
+        unit.state.outputs.update(children[-1].state.outputs)
+
+    root_scaffold = scaffold(root_work)
+    path = str(tmp_path / 'journal')
+
+    with Journal(path) as journal:
+        first = CheckpointedUnit(root_scaffold, journal=journal)
+        asyncio.run(first())
+        assert all(c.journal is journal for c in first.children)
+        assert len(journal.records) == 4
+
+    assert log == [0, 1, 2]
+    log.clear()
+
+    with Journal(path) as journal:
+        second = CheckpointedUnit(root_scaffold, journal=journal)
+        asyncio.run(second())
+
+    assert log == []
+    assert second.state.outputs == dict(n=3)
+    assert len(second.children) == 3
+
+
+def test_journal_truncated(tmp_path):
+    """Check that a journal survives a record damaged by a crash."""
+    path = str(tmp_path / 'journal')
+    key = ((), None, '')
+
+    with Journal(path) as journal:
+        journal.put(key, dict(a=1))
+        journal.put(((0,), None, ''), dict(b=2))
+
+    with open(path, 'r+b') as f:
+        f.truncate(f.seek(0, 2) - 3)
+
+    with Journal(path) as journal:
+        assert journal.records == {key: dict(a=1)}
+        journal.put(((1,), None, ''), dict(c=3))
+
+    with Journal(path) as journal:
+        assert len(journal.records) == 2
+
+
+def test_digest_canonical():
+    """Check that equal inputs have equal digests, across processes.
+
+    The order of sets of strings varies with the hash seed of each process,
+    and the order of dictionaries with the order of insertion.
+
+    """
+    inputs = dict(tags={'alpha', 'beta', 'gamma', 'delta'},
+                  nested=dict(b=[1, {'x', 'y'}], a=2))
+    reordered = dict(nested=dict(a=2, b=[1, {'y', 'x'}]),
+                     tags={'delta', 'gamma', 'beta', 'alpha'})
+    assert digest(inputs) == digest(reordered)
+    assert digest(inputs) != digest(dict(inputs, tags={'alpha'}))
+
+    code = ('from gunka.unit.checkpoint import digest; '
+            f'print(digest({inputs!r}))')
+    root = os.path.dirname(os.path.dirname(gunka.__file__))
+    digests = set()
+    for seed in ('1', '2', '3'):
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        result = subprocess.run([sys.executable, '-c', code], env=env,
+                                cwd=root, capture_output=True, text=True,
+                                check=True)
+        digests.add(result.stdout.strip())
+    assert digests == {digest(inputs)}
@@ -10,6 +10,7 @@
 from typing import Callable
 from typing import Iterable
 from typing import Optional
+from typing import Tuple
 
 # Local:
 from gunka.unit.base import BaseUnit
@@ -43,3 +44,29 @@ def first(predicate: Callable[[BaseUnit], bool], unit: BaseUnit
         if predicate(u):
             return u
     return None
+
+
+def position(unit: BaseUnit) -> Tuple[int, ...]:
+    """Locate the passed unit in its family tree.
+
+    Return the ordinals of the unit and its ancestors, from the root down,
+    excluding the root itself. The root’s position is thus an empty tuple.
+
+    """
+    ordinals = []
+    while getattr(unit, 'parent', None) is not None:
+        ordinals.append(unit.ordinal)
+        unit = unit.parent
+    return tuple(reversed(ordinals))
+
+
+def work_name(unit: BaseUnit) -> str:
+    """Name the work function of the passed unit by module and qualified name.
+
+    This is suitable for aggregating figures on units by work function.
+
+    """
+    work = unit._work
+    module = getattr(work, '__module__', None)
+    name = getattr(work, '__qualname__', None) or repr(work)
+    return f'{module}.{name}' if module else name
@@ -19,5 +19,9 @@ setup(name=gunka.__name__,
           'Programming Language :: Python :: 3',
           'Topic :: Software Development :: Libraries :: Python Modules',
       ],
+      python_requires='>=3.11',
       packages=find_packages(),
+      entry_points={
+          'console_scripts': ['gunka=gunka.runner:main'],
+      },
       )